@@ -0,0 +1,78 @@
+"""
+Счетчики рецептов по тегам для текущего набора фильтров (?facets=tags).
+Считаются одним сгруппированным запросом по связке рецепт — тег
+и кэшируются по нормализованному ключу фильтров с версиями данных.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from foodgram.cache_versions import versioned_key
+from foodgram.metrics import record_cache_access
+
+FACET_PARAMS = (
+    'author', 'cooking_time_min', 'cooking_time_max',
+    'ingredients_include', 'ingredients_exclude', 'ingredients_available',
+    'is_favorited', 'is_in_shopping_cart', 'search',
+)
+# С этими фильтрами результат зависит от пользователя.
+PERSONAL_PARAMS = ('is_favorited', 'is_in_shopping_cart')
+CACHE_NAMESPACES = ('recipes', 'tags')
+# Персональный ключ сбрасывают еще и избранное, покупки и подписки,
+# общий от них не зависит и переживает их изменения.
+PERSONAL_NAMESPACES = CACHE_NAMESPACES + ('favourites', 'carts', 'follows')
+CACHE_TIMEOUT = 3600
+
+
+def normalize_value(param, values):
+    if param == 'search':
+        return [' '.join(' '.join(values).lower().split())]
+    return sorted({
+        item.strip() for value in values for item in value.split(',')
+        if item.strip()
+    })
+
+
+def get_cache_key(request, action):
+    """Ключ не зависит от порядка параметров, id и лишних пробелов."""
+    params = sorted(
+        (param, normalize_value(param, request.query_params.getlist(param)))
+        for param in FACET_PARAMS if param in request.query_params
+    )
+    personal = action == 'feed' or any(
+        param in PERSONAL_PARAMS for param, _ in params
+    )
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    user = request.user.pk if personal else None
+    if user is None:
+        return versioned_key(
+            f'facets:tags:{action}::{digest}', *CACHE_NAMESPACES
+        )
+    return versioned_key(
+        f'facets:tags:{action}:{user}:{digest}', *PERSONAL_NAMESPACES
+    )
+
+
+def count_tags(queryset):
+    # Группировка по join со связкой, а не подзапрос: сырой SQL поиска
+    # на SQLite ссылается на recipes_recipe и не переживает алиасы.
+    rows = queryset.order_by().values('tags__id', 'tags__slug').annotate(
+        count=Count('id', distinct=True)
+    ).order_by('tags__id')
+    return [
+        {'id': row['tags__id'], 'slug': row['tags__slug'],
+         'count': row['count']}
+        for row in rows if row['tags__id'] is not None
+    ]
+
+
+def get_tag_facets(request, action, queryset):
+    """queryset — рецепты со всеми фильтрами, кроме фильтра по тегам."""
+    key = get_cache_key(request, action)
+    facets = cache.get(key)
+    record_cache_access('tag_facets', facets is not None)
+    if facets is None:
+        facets = count_tags(queryset)
+        cache.set(key, facets, CACHE_TIMEOUT)
+    return facets
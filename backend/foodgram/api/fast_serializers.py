@@ -0,0 +1,147 @@
+from collections import defaultdict
+
+from foodgram.middleware import measure
+from recipes import models
+from users.models import User
+
+
+def build_image_url(name, request=None):
+    if not name:
+        return None
+    url = models.Recipe._meta.get_field('image').storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class ValuesSerializer:
+    """
+    Сериализатор только для чтения, работающий со строками .values().
+    Отдает тот же JSON, что и соответствующий ModelSerializer,
+    но не создает экземпляры моделей и объекты полей.
+    """
+    fields = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+    def get_values(self, queryset):
+        return queryset.values(*self.fields)
+
+    def to_representation(self, row):
+        return {field: row[field] for field in self.fields}
+
+    def serialize(self, rows):
+        with measure(self.context.get('request'), 'serialize_time'):
+            return self.build(rows)
+
+    def build(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class IngredientValuesSerializer(ValuesSerializer):
+    fields = ('id', 'name', 'measurement_unit')
+
+
+class TagValuesSerializer(ValuesSerializer):
+    fields = ('id', 'name', 'color', 'slug')
+
+
+class RecipeAnonymousValuesSerializer(ValuesSerializer):
+    fields = (
+        'id', 'tags', 'ingredients',
+        'image', 'name', 'text', 'cooking_time', 'author'
+    )
+    column_fields = ('image', 'name', 'text', 'cooking_time')
+    author_fields = ('id', 'email', 'username', 'first_name', 'last_name')
+
+    def get_fields(self):
+        fields = self.context.get('fields')
+        return self.fields if fields is None else fields
+
+    def get_values(self, queryset):
+        fields = self.get_fields()
+        columns = ['id']
+        columns.extend(
+            field for field in self.column_fields if field in fields
+        )
+        if 'author' in fields:
+            columns.append('author_id')
+        columns.extend(queryset.query.annotations)
+        return queryset.values(*columns)
+
+    def get_image_url(self, name):
+        return build_image_url(name, self.context.get('request'))
+
+    @staticmethod
+    def get_tags(recipe_ids):
+        tags = defaultdict(list)
+        rows = models.Recipe.tags.through.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('tag_id').values(
+            'recipe_id', 'tag__id', 'tag__name', 'tag__color', 'tag__slug'
+        )
+        for row in rows:
+            tags[row['recipe_id']].append({
+                'id': row['tag__id'],
+                'name': row['tag__name'],
+                'color': row['tag__color'],
+                'slug': row['tag__slug'],
+            })
+        return tags
+
+    @staticmethod
+    def get_ingredients(recipe_ids):
+        ingredients = defaultdict(list)
+        rows = models.Recipe.ingredients.through.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('ingredientamount_id').values(
+            'recipe_id',
+            'ingredientamount__ingredient__id',
+            'ingredientamount__amount',
+            'ingredientamount__ingredient__name',
+            'ingredientamount__ingredient__measurement_unit',
+        )
+        for row in rows:
+            ingredients[row['recipe_id']].append({
+                'id': row['ingredientamount__ingredient__id'],
+                'amount': float(row['ingredientamount__amount']),
+                'name': row['ingredientamount__ingredient__name'],
+                'measurement_unit': row[
+                    'ingredientamount__ingredient__measurement_unit'
+                ],
+            })
+        return ingredients
+
+    def get_authors(self, author_ids):
+        return {
+            author['id']: author for author in User.objects.filter(
+                id__in=author_ids
+            ).values(*self.author_fields)
+        }
+
+    def build(self, rows):
+        fields = self.get_fields()
+        rows = list(rows)
+        recipe_ids = [row['id'] for row in rows]
+        related = {}
+        if 'tags' in fields:
+            related['tags'] = self.get_tags(recipe_ids)
+        if 'ingredients' in fields:
+            related['ingredients'] = self.get_ingredients(recipe_ids)
+        if 'author' in fields:
+            authors = self.get_authors({row['author_id'] for row in rows})
+        data = []
+        for row in rows:
+            item = {}
+            for field in fields:
+                if field in related:
+                    item[field] = related[field][row['id']]
+                elif field == 'author':
+                    item[field] = authors[row['author_id']]
+                elif field == 'image':
+                    item[field] = self.get_image_url(row['image'])
+                else:
+                    item[field] = row[field]
+            data.append(item)
+        return data
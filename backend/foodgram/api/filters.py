@@ -1,11 +1,74 @@
 from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from recipes.ingredient_index import filter_by_ingredients
+from recipes.search import search_recipes
 
 
 class RecipeFilterCustom(filters.BaseFilterBackend):
+    ingredient_params = (
+        'ingredients_include', 'ingredients_exclude', 'ingredients_available'
+    )
+    filter_params = (
+        'tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+        'cooking_time_min', 'cooking_time_max', 'search',
+    ) + ingredient_params
+    # Каждой сортировке соответствует составной индекс из Recipe.Meta.
+    orderings = {
+        'newest': ('-pub_date', '-id'),
+        'fastest': ('cooking_time', '-pub_date', '-id'),
+        'popular': ('-favourites_count', '-pub_date', '-id'),
+    }
+
+    @staticmethod
+    def get_id_list(request, param):
+        ids = []
+        for value in request.query_params.getlist(param):
+            for pk in value.split(','):
+                if not pk.strip().isdigit():
+                    raise ValidationError(
+                        {param: 'Ожидается список id через запятую'}
+                    )
+                ids.append(int(pk))
+        return ids
+
+    @staticmethod
+    def get_int(request, param):
+        value = request.query_params.get(param, '').strip()
+        if not value:
+            return None
+        if not value.isdigit():
+            raise ValidationError({param: 'Ожидается целое число'})
+        return int(value)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get('ordering')
+        if ordering is None:
+            return None
+        if ordering not in self.orderings:
+            raise ValidationError({
+                'ordering': 'Допустимые значения: '
+                            + ', '.join(self.orderings)
+            })
+        return self.orderings[ordering]
+
+    def filter_cooking_time(self, request, queryset):
+        cooking_time_min = self.get_int(request, 'cooking_time_min')
+        if cooking_time_min is not None:
+            queryset = queryset.filter(cooking_time__gte=cooking_time_min)
+        cooking_time_max = self.get_int(request, 'cooking_time_max')
+        if cooking_time_max is not None:
+            queryset = queryset.filter(cooking_time__lte=cooking_time_max)
+        return queryset
+
     def filter_queryset(self, request, queryset, view):
         tags = request.query_params.getlist('tags')
         if len(tags) != 0:
             queryset = queryset.filter(tags__slug__in=tags).distinct()
+        return self.filter_queryset_without_tags(request, queryset)
+
+    def filter_queryset_without_tags(self, request, queryset):
+        """Все фильтры, кроме тегов: база для счетчиков по тегам."""
         author = request.query_params.get('author')
         if author is not None:
             queryset = queryset.filter(author__id=author)
@@ -17,6 +80,24 @@ class RecipeFilterCustom(filters.BaseFilterBackend):
             queryset = queryset.filter(
                 id__in=request.user.carts.values('recipe')
             ).distinct()
+        queryset = self.filter_cooking_time(request, queryset)
+        include, exclude, available = (
+            self.get_id_list(request, param)
+            for param in self.ingredient_params
+        )
+        if include or exclude or available:
+            queryset = filter_by_ingredients(
+                queryset, include, exclude, available
+            )
+        ordering = self.get_ordering(request)
+        search = request.query_params.get('search', '').strip()
+        if search:
+            # Курсорная пагинация поиска опирается на порядок по рангу.
+            return search_recipes(queryset, search).order_by(
+                '-search_rank', '-id'
+            )
+        if ordering is not None:
+            queryset = queryset.order_by(*ordering)
         return queryset
 
 
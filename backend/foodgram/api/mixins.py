@@ -1,4 +1,5 @@
 from rest_framework import mixins, viewsets
+from rest_framework.response import Response
 
 
 class CreateRetrieveListViewSet(
@@ -16,3 +17,29 @@ class CreateDeleteViewSet(
     viewsets.GenericViewSet
 ):
     pass
+
+
+class ValuesListMixin:
+    """
+    Отдает список через ValuesSerializer, минуя ModelSerializer.
+    Если get_values_serializer_class вернул None, работает обычный list.
+    """
+    values_serializer_class = None
+
+    def get_values_serializer_class(self):
+        return self.values_serializer_class
+
+    def list(self, request, *args, **kwargs):
+        values_serializer_class = self.get_values_serializer_class()
+        if values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        serializer = values_serializer_class(
+            context=self.get_serializer_context()
+        )
+        queryset = serializer.get_values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
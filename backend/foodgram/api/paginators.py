@@ -1,7 +1,110 @@
+import base64
+from collections import OrderedDict
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CountPaginator(Paginator):
+    """
+    Считает объекты без аннотаций queryset'а (is_favorited и т.п.),
+    чтобы COUNT не тянул за собой подзапросы и GROUP BY.
+    """
+    @cached_property
+    def count(self):
+        return self.object_list.values('pk').count()
 
 
 class LimitPagePaginator(PageNumberPagination):
+    django_paginator_class = CountPaginator
     page_size = 5
     page_size_query_param = 'limit'
     max_page_size = 10
+
+
+class FeedPaginator(LimitPagePaginator):
+    """
+    Лента — пары из TimelineEntry, возможно объединенные UNION,
+    их считает обычный COUNT(*) по запросу.
+    """
+    django_paginator_class = Paginator
+
+
+class RecipePaginator(LimitPagePaginator):
+    """
+    Для полнотекстового поиска (?search=) — keyset-пагинация
+    по (search_rank, id) через параметр cursor, иначе — постраничная.
+    count в ответе есть в обоих случаях: его показывает фронтенд.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = bool(request.query_params.get('search', '').strip())
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        self.count = queryset.values('pk').count()
+        if position is not None:
+            rank, pk = position
+            queryset = queryset.filter(
+                Q(search_rank__lt=rank) | Q(search_rank=rank, id__lt=pk)
+            )
+        page = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = self.get_position(page[-1])
+        return page
+
+    @staticmethod
+    def get_position(item):
+        if isinstance(item, dict):
+            return item['search_rank'], item['id']
+        return item.search_rank, item.id
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            rank, pk = base64.urlsafe_b64decode(
+                encoded.encode('ascii')
+            ).decode('ascii').split(':')
+            return float(rank), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        rank, pk = position
+        return base64.urlsafe_b64encode(
+            f'{rank!r}:{pk}'.encode('ascii')
+        ).decode('ascii')
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data),
+        ]))
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoParser
+from django.http.multipartparser import MultiPartParserError
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, DataAndFiles, MultiPartParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Отдает тело запроса как итератор строк, не читая его целиком:
+    разбор каждой строки — дело представления.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return iter(stream) if stream is not None else iter(())
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет файл сразу во временный файл на диске. Сверх
+    UPLOAD_FILE_MAX_SIZE байт данные только считаются: в file.size
+    остается настоящий размер, и поле отклоняет файл, не читая его.
+    """
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) <= settings.UPLOAD_FILE_MAX_SIZE:
+            self.file.write(raw_data)
+
+
+class StreamingMultiPartParser(MultiPartParser):
+    """
+    multipart/form-data, в котором файлы любого размера пишутся
+    во временные файлы, а не в память процесса.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        handlers = [LimitedTemporaryFileUploadHandler(request)]
+        try:
+            data, files = DjangoParser(
+                meta, stream, handlers,
+                parser_context.get('encoding', settings.DEFAULT_CHARSET)
+            ).parse()
+        except MultiPartParserError as error:
+            raise ParseError(f'Ошибка разбора multipart: {error}')
+        return DataAndFiles(data, files)
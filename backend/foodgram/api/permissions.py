@@ -25,3 +25,15 @@ class IsAuthenticatedOrReadOnlyPost(permissions.BasePermission):
             or request.method == 'POST' or request.user
             and request.user.is_authenticated
         )
+
+
+class CanImportRecipes(permissions.BasePermission):
+    """Импорт рецептов: staff или партнеры с правом recipes.import_recipes."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated and (
+                user.is_staff or user.has_perm('recipes.import_recipes')
+            )
+        )
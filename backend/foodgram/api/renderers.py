@@ -0,0 +1,16 @@
+from rest_framework.renderers import JSONRenderer
+
+from foodgram.middleware import measure
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, записывающий время кодирования JSON в request.metrics
+    (см. foodgram.middleware.RequestTimingMiddleware).
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        request = (renderer_context or {}).get('request')
+        with measure(request, 'render_time'):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
@@ -1,13 +1,78 @@
+from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
+from django.core.files.uploadedfile import UploadedFile
 from django.shortcuts import get_object_or_404
-from drf_extra_fields.fields import Base64ImageField
+from drf_extra_fields.fields import Base64FieldMixin, Base64ImageField
+from PIL import Image
 from rest_framework import serializers
 
+from foodgram.middleware import measure
 from recipes import models
 from users.models import Follow, User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Оставляет в ответе только поля, переданные во view через
+    context['fields'] (см. RecipeView.get_requested_fields).
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested is not None:
+            for field_name in set(self.fields) - set(requested):
+                self.fields.pop(field_name)
+
+
+class TimedRepresentationMixin:
+    """
+    Время to_representation (без SQL) попадает в Server-Timing
+    как serialize, см. foodgram.middleware.RequestMetrics.
+    """
+    def to_representation(self, instance):
+        with measure(self.context.get('request'), 'serialize_time'):
+            return super().to_representation(instance)
+
+
+class RecipeImageField(Base64ImageField):
+    """
+    Картинка рецепта: base64-строка в JSON или файл из multipart/form-data.
+    Размер и габариты проверяются до полного декодирования картинки.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            self.check_size(data.size)
+            self.check_dimensions(data)
+            return super(Base64FieldMixin, self).to_internal_value(data)
+        if isinstance(data, str):
+            self.check_size(len(data) * 3 // 4)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def check_size(size):
+        if size > settings.UPLOAD_FILE_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Размер картинки больше '
+                f'{settings.UPLOAD_FILE_MAX_SIZE // 2 ** 20} МБ'
+            )
+
+    @staticmethod
+    def check_dimensions(file):
+        """Image.open читает только заголовок картинки."""
+        try:
+            width, height = Image.open(file).size
+        except Exception:
+            raise serializers.ValidationError('Файл не является картинкой')
+        finally:
+            file.seek(0)
+        if max(width, height) > settings.RECIPE_IMAGE_MAX_SIDE:
+            raise serializers.ValidationError(
+                f'Сторона картинки больше '
+                f'{settings.RECIPE_IMAGE_MAX_SIDE} пикселей'
+            )
+
+
+class UserSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     def create(self, validated_data):
@@ -17,6 +82,9 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
     def get_is_subscribed(self, obj):
+        subscribed_authors = self.context.get('subscribed_authors')
+        if subscribed_authors is not None:
+            return obj.id in subscribed_authors
         return Follow.objects.filter(
             user=self.context['request'].user, author=obj
         ).exists()
@@ -48,7 +116,8 @@ class ChangePasswordSerializer(serializers.Serializer):
         return value
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedRepresentationMixin,
+                           serializers.ModelSerializer):
 
     class Meta:
         model = models.Ingredient
@@ -81,7 +150,8 @@ class AuthorSerialiser(serializers.ModelSerializer):
         fields = ('email', 'id', 'username', 'first_name', 'last_name')
 
 
-class UserSerializerAnonymous(serializers.ModelSerializer):
+class UserSerializerAnonymous(TimedRepresentationMixin,
+                              serializers.ModelSerializer):
     def create(self, validated_data):
         user = super().create(validated_data)
         user.set_password(validated_data['password'])
@@ -98,7 +168,8 @@ class UserSerializerAnonymous(serializers.ModelSerializer):
         }
 
 
-class RecipeSerializerAnonymous(serializers.ModelSerializer):
+class RecipeSerializerAnonymous(TimedRepresentationMixin, SparseFieldsMixin,
+                                serializers.ModelSerializer):
     ingredients = IngredientWithAmountSerializer(many=True, required=True)
     tags = TagSerializer(many=True, required=True)
     author = UserSerializerAnonymous(many=False, read_only=True)
@@ -112,7 +183,8 @@ class RecipeSerializerAnonymous(serializers.ModelSerializer):
         )
 
 
-class RecipeSerializerGet(serializers.ModelSerializer):
+class RecipeSerializerGet(TimedRepresentationMixin, SparseFieldsMixin,
+                          serializers.ModelSerializer):
     ingredients = IngredientWithAmountSerializer(many=True, required=True)
     tags = TagSerializer(many=True, required=True)
     author = UserSerializer(many=False, read_only=True)
@@ -121,11 +193,15 @@ class RecipeSerializerGet(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return models.Cart.objects.filter(
             user=self.context['request'].user, recipe=obj
         ).exists()
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return models.Favourite.objects.filter(
             user=self.context['request'].user, recipe=obj
         ).exists()
@@ -144,6 +220,7 @@ class RecipeSerializer(RecipeSerializerGet):
         queryset=models.Tag.objects.all(),
         many=True
     )
+    image = RecipeImageField(max_length=None, use_url=True)
 
     def validate(self, data):
         for data_ingredient in data['ingredients']:
@@ -247,44 +324,8 @@ class SubscriptionsSerializer(UserSerializer):
         return serializer.data
 
 
-class FavouriteSerializer(serializers.ModelSerializer):
-    name = serializers.SlugRelatedField(
-        slug_field='name',
-        read_only=True,
-        source='recipe'
-    )
-    image = serializers.ImageField(source='recipe.image', read_only=True)
-    user = serializers.SlugRelatedField(
-        slug_field='username',
-        read_only=True
-    )
-    cooking_time = serializers.IntegerField(
-        source='recipe.cooking_time', read_only=True
-    )
-
-    def validate(self, attrs):
-        if self.Meta.model.objects.filter(
-                user=self.context['request'].user, recipe=self.context['pk']
-        ).exists():
-            raise serializers.ValidationError(
-                'Нельзя дважды один и тот же '
-                'рецепт добавить в избранное или в покупки'
-            )
-        return attrs
-
-    class Meta:
-        model = models.Favourite
-        fields = ('id', 'user', 'cooking_time', 'name', 'image',)
-
-
-class CartSerializer(FavouriteSerializer):
-
-    class Meta:
-        model = models.Cart
-        fields = ('id', 'user', 'cooking_time', 'name', 'image')
-
-
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(TimedRepresentationMixin,
+                       serializers.ModelSerializer):
     author = SubscriptionsSerializer(read_only=True)
     user = serializers.SlugRelatedField(
         slug_field='username',
@@ -310,3 +351,29 @@ class FollowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Follow
         fields = '__all__'
+
+
+class BatchRelationSerializer(serializers.Serializer):
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        default=list,
+        max_length=100
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        default=list,
+        max_length=100
+    )
+
+    def validate(self, attrs):
+        if not attrs['add'] and not attrs['remove']:
+            raise serializers.ValidationError(
+                'Нужно передать хотя бы один id в add или remove'
+            )
+        if set(attrs['add']) & set(attrs['remove']):
+            raise serializers.ValidationError(
+                'Один и тот же id нельзя одновременно добавить и удалить'
+            )
+        attrs['add'] = list(dict.fromkeys(attrs['add']))
+        attrs['remove'] = list(dict.fromkeys(attrs['remove']))
+        return attrs
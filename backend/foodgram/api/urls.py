@@ -27,6 +27,7 @@ router_v1.register('users', views.UserViewSet, basename='user')
 router_v1.register('ingredients', views.IngredientsView, basename='ingredient')
 router_v1.register('tags', views.TagsView, basename='tag')
 router_v1.register('recipes', views.RecipeView, basename='recipe')
+router_v1.register('profiles', views.ProfilesView, basename='profile')
 
 
 urlpatterns = [
@@ -41,6 +42,22 @@ urlpatterns = [
         TokenDestroyView.as_view(),
         name='token_delete_pair'
     ),
+    path('export/', views.ExportView.as_view(), name='export'),
+    path(
+        'recipes/favorite/batch/',
+        views.FavouriteBatchView.as_view(),
+        name='batch_favourites'
+    ),
+    path(
+        'recipes/shopping_cart/batch/',
+        views.CartBatchView.as_view(),
+        name='batch_cart'
+    ),
+    path(
+        'users/subscribe/batch/',
+        views.FollowBatchView.as_view(),
+        name='batch_subscriptions'
+    ),
     path(
         'recipes/<int:recipe_id>/favorite/',
         views.FavouriteView.as_view(),
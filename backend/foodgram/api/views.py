@@ -1,19 +1,36 @@
 from io import StringIO
+from itertools import islice
 
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Exists, OuterRef, Sum
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, JSONParser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from api import serializers
+from api import fast_serializers, serializers
+from api.facets import get_tag_facets
+from api.fast_serializers import build_image_url
 from api.filters import IngredientSearchCustom, RecipeFilterCustom
-from api.mixins import CreateRetrieveListViewSet
-from api.paginators import LimitPagePaginator
-from api.permissions import AuthorAdminOrRead, IsAuthenticatedOrReadOnlyPost
-from recipes import models
+from api.mixins import CreateRetrieveListViewSet, ValuesListMixin
+from api.paginators import (FeedPaginator, LimitPagePaginator,
+                            RecipePaginator)
+from api.parsers import NDJSONParser, StreamingMultiPartParser
+from api.permissions import (AuthorAdminOrRead, CanImportRecipes,
+                             IsAuthenticatedOrReadOnlyPost)
+from foodgram import cache_versions
+from foodgram.profiling import get_profile_path, list_profiles
+from recipes import author_stats, export, importer, models, popularity
+from recipes.counters import refresh_favourites_count
+from recipes.feed import backfill_timeline, feed_entries, feed_recipes
 from users.models import Follow, User
 
 
@@ -44,6 +61,24 @@ class UserViewSet(CreateRetrieveListViewSet):
         )
         return Response(serializer.data)
 
+    @action(
+        detail=False,
+        url_path='me/stats',
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def stats(self, request):
+        """Избранное, покупки и подписчики автора по дням и рецептам."""
+        days = request.query_params.get('days', author_stats.DEFAULT_DAYS)
+        try:
+            days = int(days)
+        except (TypeError, ValueError):
+            days = 0
+        if not 1 <= days <= author_stats.MAX_DAYS:
+            raise ValidationError(
+                {'days': f'Целое число от 1 до {author_stats.MAX_DAYS}'}
+            )
+        return Response(author_stats.get_author_stats(request.user.id, days))
+
     @action(
         detail=False,
         url_name='set_password',
@@ -76,35 +111,352 @@ class UserViewSet(CreateRetrieveListViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class IngredientsView(viewsets.ReadOnlyModelViewSet):
+class IngredientsView(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    values_serializer_class = fast_serializers.IngredientValuesSerializer
     filter_backends = (IngredientSearchCustom, )
     search_fields = ('$name', '^name', )
 
 
-class TagsView(viewsets.ReadOnlyModelViewSet):
+class TagsView(ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = models.Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    values_serializer_class = fast_serializers.TagValuesSerializer
+
 
+class ProfilesView(viewsets.ViewSet):
+    """Сохраненные профили запросов (см. foodgram.profiling)."""
+    permission_classes = (permissions.IsAdminUser, )
+    lookup_value_regex = r'[\w.-]+'
 
-class RecipeView(viewsets.ModelViewSet):
+    def list(self, request):
+        return Response(list_profiles())
+
+    def retrieve(self, request, pk=None):
+        path = get_profile_path(pk)
+        if path is None:
+            raise Http404
+        return FileResponse(
+            open(path, 'rb'), as_attachment=True, filename=pk
+        )
+
+
+class ExportView(APIView):
+    """Потоковая выгрузка данных для аналитики (см. recipes.export)."""
+    permission_classes = (permissions.IsAdminUser, )
+
+    def get(self, request):
+        tables = request.query_params.get('tables')
+        tables = tables.split(',') if tables else export.TABLES
+        if set(tables) - set(export.TABLES):
+            raise ValidationError(
+                {'tables': f'Допустимые таблицы: {", ".join(export.TABLES)}'}
+            )
+        since = request.query_params.get('since')
+        try:
+            since = export.parse_since(since) if since else None
+        except ValueError as error:
+            raise ValidationError({'since': str(error)})
+        # Тело отдается после выхода из middleware, поэтому базу
+        # для чтения выбираем сейчас, пока известна реплика запроса.
+        records = export.iter_records(
+            tables, since, using=router.db_for_read(models.Recipe)
+        )
+        response = StreamingHttpResponse(
+            export.iter_ndjson_gzip(records), content_type='application/gzip'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="foodgram-'
+            f'{timezone.now():%Y%m%d-%H%M%S}.ndjson.gz"'
+        )
+        return response
+
+
+class RecipeView(ValuesListMixin, viewsets.ModelViewSet):
     queryset = models.Recipe.objects.all()
-    pagination_class = LimitPagePaginator
+    pagination_class = RecipePaginator
     filter_backends = (RecipeFilterCustom, )
     permission_classes = (AuthorAdminOrRead, )
+    parser_classes = (JSONParser, FormParser, StreamingMultiPartParser)
+    read_actions = ('list', 'feed', 'retrieve', 'batch')
+    list_actions = ('list', 'feed')
+    batch_max_size = 50
+    list_fields = (
+        'id', 'tags', 'author', 'image', 'is_favorited', 'name',
+        'cooking_time', 'is_in_shopping_cart'
+    )
+
+    @staticmethod
+    def get_field_names(request, param):
+        """
+        Имена из параметра. Допустимы поля полного ответа, чтобы один
+        и тот же URL работал и для гостя, и для пользователя.
+        """
+        names = {
+            name.strip()
+            for name in request.query_params[param].split(',')
+            if name.strip()
+        }
+        unknown = names - set(serializers.RecipeSerializerGet.Meta.fields)
+        if unknown:
+            raise ValidationError({
+                param: 'Неизвестные поля: ' + ', '.join(sorted(unknown))
+            })
+        return names
+
+    def get_requested_fields(self):
+        """
+        Поля ответа из ?fields= или ?omit=, для списка по умолчанию
+        отдаются только поля карточки рецепта. id отдается всегда.
+        """
+        if self.action not in self.read_actions:
+            return None
+        all_fields = self.get_serializer_class().Meta.fields
+        query_params = self.request.query_params
+        if 'fields' in query_params:
+            requested = self.get_field_names(self.request, 'fields')
+            if not requested:
+                raise ValidationError({'fields': 'Не передано ни одного поля'})
+        elif 'omit' in query_params:
+            requested = set(all_fields) - self.get_field_names(
+                self.request, 'omit'
+            )
+        elif self.action in self.list_actions:
+            requested = set(self.list_fields)
+        else:
+            return None
+        requested.add('id')
+        return [field for field in all_fields if field in requested]
+
+    def get_queryset(self):
+        queryset = super().get_queryset().defer('search_vector')
+        if self.action not in self.read_actions:
+            return queryset
+        fields = self.get_requested_fields()
+        if fields is None:
+            fields = self.get_serializer_class().Meta.fields
+        if 'author' in fields:
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related('ingredients__ingredient')
+        user = self.request.user
+        if user.is_authenticated:
+            if 'is_favorited' in fields:
+                queryset = queryset.annotate(is_favorited=Exists(
+                    models.Favourite.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )
+                ))
+            if 'is_in_shopping_cart' in fields:
+                queryset = queryset.annotate(is_in_shopping_cart=Exists(
+                    models.Cart.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )
+                ))
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.get_requested_fields()
+        context['fields'] = fields
+        user = self.request.user
+        if self.action in self.read_actions and user.is_authenticated and (
+                fields is None or 'author' in fields
+        ):
+            context['subscribed_authors'] = set(
+                Follow.objects.filter(user=user).values_list(
+                    'author_id', flat=True
+                )
+            )
+        return context
+
+    def get_values_serializer_class(self):
+        if not self.request.user.is_authenticated:
+            return fast_serializers.RecipeAnonymousValuesSerializer
+        return None
 
     def get_serializer_class(self):
         if not self.request.user.is_authenticated and (
-                self.action == 'list' or self.action == 'retrieve'
+                self.action in self.read_actions
         ):
             return serializers.RecipeSerializerAnonymous
         elif self.request.user.is_authenticated and (
-                self.action == 'list' or self.action == 'retrieve'
+                self.action in self.read_actions
         ):
             return serializers.RecipeSerializerGet
         return serializers.RecipeSerializer
 
+    def add_tag_facets(self, response, queryset):
+        request = self.request
+        if request.query_params.get('facets') == 'tags' and isinstance(
+                response.data, dict
+        ):
+            response.data['facets'] = {'tags': get_tag_facets(
+                request, self.action,
+                RecipeFilterCustom().filter_queryset_without_tags(
+                    request, queryset
+                )
+            )}
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.add_tag_facets(
+            super().list(request, *args, **kwargs), self.get_queryset()
+        )
+
+    def get_batch_ids(self):
+        ids = []
+        for value in self.request.query_params.getlist('ids'):
+            for pk in value.split(','):
+                if not pk.strip().isdigit():
+                    raise ValidationError(
+                        {'ids': 'Ожидается список id через запятую'}
+                    )
+                if int(pk) not in ids:
+                    ids.append(int(pk))
+        if not ids:
+            raise ValidationError({'ids': 'Не передано ни одного id'})
+        if len(ids) > self.batch_max_size:
+            raise ValidationError(
+                {'ids': f'Можно запросить не более '
+                        f'{self.batch_max_size} рецептов за раз'}
+            )
+        return ids
+
+    @action(detail=False, methods=['GET'])
+    def batch(self, request):
+        ids = self.get_batch_ids()
+        position = {pk: index for index, pk in enumerate(ids)}
+        queryset = self.get_queryset().filter(id__in=ids)
+        values_serializer_class = self.get_values_serializer_class()
+        if values_serializer_class is not None:
+            serializer = values_serializer_class(
+                context=self.get_serializer_context()
+            )
+            recipes = sorted(
+                serializer.get_values(queryset),
+                key=lambda row: position[row['id']]
+            )
+            found = {row['id'] for row in recipes}
+            data = serializer.serialize(recipes)
+        else:
+            recipes = sorted(
+                queryset, key=lambda recipe: position[recipe.id]
+            )
+            found = {recipe.id for recipe in recipes}
+            data = self.get_serializer(recipes, many=True).data
+        return Response({
+            'results': data,
+            'missing': [pk for pk in ids if pk not in found],
+        })
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[permissions.IsAuthenticated],
+        pagination_class=FeedPaginator
+    )
+    def feed(self, request):
+        """
+        Рецепты авторов из подписок, новые сверху. Страница берется
+        из ленты, рецепты страницы догружаются по id. Фильтры списка
+        работают и здесь, сортировка всегда по дате публикации.
+        """
+        recipes = None
+        if any(
+                param in request.query_params
+                for param in RecipeFilterCustom.filter_params
+        ):
+            recipes = self.filter_queryset(models.Recipe.objects.all())
+        page = self.paginate_queryset(feed_entries(request.user, recipes))
+        found = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _ in page]
+        )
+        serializer = self.get_serializer(
+            [found[recipe_id] for recipe_id, _ in page if recipe_id in found],
+            many=True
+        )
+        return self.add_tag_facets(
+            self.get_paginated_response(serializer.data),
+            feed_recipes(self.get_queryset(), request.user)
+        )
+
+    @staticmethod
+    def compact_recipes(rows, request):
+        """Строки (id, name, image, cooking_time, score) в ответ API."""
+        return [
+            {
+                'id': recipe_id,
+                'name': name,
+                'image': build_image_url(image, request),
+                'cooking_time': cooking_time,
+                'score': score,
+            }
+            for recipe_id, name, image, cooking_time, score in rows
+        ]
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        url_path='import',
+        parser_classes=(NDJSONParser, ),
+        permission_classes=[CanImportRecipes]
+    )
+    def import_recipes(self, request):
+        """
+        Импорт рецептов из NDJSON (см. recipes.importer),
+        не больше IMPORT_MAX_ROWS строк за запрос.
+        """
+        lines = list(islice(request.data, settings.IMPORT_MAX_ROWS + 1))
+        if len(lines) > settings.IMPORT_MAX_ROWS:
+            raise ValidationError(
+                f'Не больше {settings.IMPORT_MAX_ROWS} строк за запрос'
+            )
+        report = list(importer.import_recipes(lines, request.user))
+        created = sum(row['result'] == 'created' for row in report)
+        return Response(
+            {
+                'created': created,
+                'failed': len(report) - created,
+                'rows': report,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['GET'])
+    def similar(self, request, pk=None):
+        """Готовый top-K из SimilarRecipe, см. recipes/similarity.py."""
+        if not pk.isdigit():
+            raise Http404
+        rows = [
+            (*row[:-1], round(row[-1], 4))
+            for row in models.SimilarRecipe.objects.filter(
+                recipe_id=pk
+            ).order_by('rank').values_list(
+                'similar_id', 'similar__name', 'similar__image',
+                'similar__cooking_time', 'score'
+            )
+        ]
+        if not rows and not models.Recipe.objects.filter(id=pk).exists():
+            raise Http404
+        return Response(self.compact_recipes(rows, request))
+
+    @action(detail=False, methods=['GET'])
+    def popular(self, request):
+        """Готовый top-N за окно ?window=day|week|all, см. popularity."""
+        window = request.query_params.get('window', models.PopularRecipe.WEEK)
+        if window not in popularity.WINDOWS:
+            raise ValidationError({
+                'window': 'Допустимые значения: '
+                          + ', '.join(popularity.WINDOWS)
+            })
+        return Response(self.compact_recipes(
+            popularity.get_popular_recipes(window), request
+        ))
+
     @action(
         detail=False,
         methods=['GET'],
@@ -156,22 +508,65 @@ class CustomDeletePost(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class FavouriteView(CustomDeletePost):
+class RecipeRelationView(APIView):
+    """
+    Добавление рецепта в избранное или в покупки одним INSERT,
+    повторное добавление отсекается уникальным ограничением в БД.
+    Карточка рецепта читается после вставки, а обработчики post_save
+    в той же транзакции обновляют счетчик избранного, сводки активности
+    и статистики автора и версию кэша.
+    """
+    permission_classes = [permissions.IsAuthenticated, ]
+    model = None
+    duplicate_message = (
+        'Нельзя дважды один и тот же '
+        'рецепт добавить в избранное или в покупки'
+    )
 
     def post(self, request, recipe_id):
-        recipe = get_object_or_404(models.Recipe, id=recipe_id)
-        dict_to_return = self.custom_post(
-            request, recipe_id,
-            serializers.FavouriteSerializer, {'recipe': recipe}
+        try:
+            with transaction.atomic():
+                relation = self.model.objects.create(
+                    user=request.user, recipe_id=recipe_id
+                )
+        except IntegrityError:
+            # Нарушен либо внешний ключ на рецепт, либо уникальность
+            # пары: текст ошибки зависит от БД, поэтому смотрим на рецепт.
+            if not models.Recipe.objects.filter(id=recipe_id).exists():
+                raise Http404
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.duplicate_message]}
+            )
+        recipe = models.Recipe.objects.filter(id=recipe_id).values(
+            'name', 'image', 'cooking_time'
+        ).first()
+        if recipe is None:
+            raise Http404
+        return Response(
+            {
+                'id': relation.id,
+                'cooking_time': recipe['cooking_time'],
+                'name': recipe['name'],
+                'image': build_image_url(recipe['image'], request),
+            },
+            status=status.HTTP_201_CREATED
         )
-        del dict_to_return['user']
-        return Response(dict_to_return, status=status.HTTP_201_CREATED)
 
     def delete(self, request, recipe_id):
-        recipe = get_object_or_404(models.Recipe, id=recipe_id)
-        return self.custom_delete(
-            models.Favourite, request, {'recipe': recipe}
-        )
+        deleted, _ = self.model.objects.filter(
+            user=request.user, recipe_id=recipe_id
+        ).delete()
+        if not deleted:
+            raise Http404
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class FavouriteView(RecipeRelationView):
+    model = models.Favourite
+
+
+class CartView(RecipeRelationView):
+    model = models.Cart
 
 
 class FollowView(CustomDeletePost):
@@ -194,15 +589,150 @@ class FollowView(CustomDeletePost):
         )
 
 
-class CartView(CustomDeletePost):
-    def post(self, request, recipe_id):
-        recipe = get_object_or_404(models.Recipe, id=recipe_id)
-        dict_to_return = self.custom_post(
-            request, recipe_id, serializers.CartSerializer, {'recipe': recipe}
-        )
-        del dict_to_return['user']
-        return Response(dict_to_return, status=status.HTTP_201_CREATED)
+class BatchRelationView(APIView):
+    """
+    Пакетное добавление и удаление связей пользователя
+    (избранное, покупки, подписки) в одной транзакции.
+    """
+    permission_classes = [permissions.IsAuthenticated, ]
+    model = None
+    target_model = None
+    target_field = None
+    cache_namespace = None
 
-    def delete(self, request, recipe_id):
-        recipe = get_object_or_404(models.Recipe, id=recipe_id)
-        return self.custom_delete(models.Cart, request, {'recipe': recipe})
+    def get_forbidden_ids(self, request):
+        return set()
+
+    def update_counters(self, rows):
+        """
+        Счетчики и сводки для вставленных строк: пакетная вставка
+        не отправляет сигналы по строкам. rows — пары (id цели, created).
+        """
+
+    def insert_relations(self, target_ids):
+        """
+        Один INSERT ... ON CONFLICT DO NOTHING RETURNING: возвращает id
+        целей только тех строк, которые вставил этот запрос. Строку
+        с той же парой (пользователь, цель), вставленную параллельным
+        запросом, база пропускает и не возвращает.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        opts = self.model._meta
+        target_column = opts.get_field(self.target_field).column
+        created = timezone.now()
+        placeholders = ', '.join(['(%s, %s, %s)'] * len(target_ids))
+        params = []
+        for pk in target_ids:
+            params += [
+                self.request.user.id, pk,
+                connection.ops.adapt_datetimefield_value(created),
+            ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(opts.db_table)} '
+                f'({quote(opts.get_field("user").column)}, '
+                f'{quote(target_column)}, {quote("created")}) '
+                f'VALUES {placeholders} ON CONFLICT DO NOTHING '
+                f'RETURNING {quote(target_column)}',
+                params
+            )
+            return [(pk, created) for pk, in cursor.fetchall()]
+
+    def add_relations(self, relations, add, forbidden):
+        target_id = f'{self.target_field}_id'
+        present = set(relations.filter(
+            **{f'{target_id}__in': add}
+        ).values_list(target_id, flat=True))
+        targets = set(self.target_model.objects.filter(
+            id__in=add
+        ).values_list('id', flat=True))
+        added = {}
+        for pk in add:
+            if pk in forbidden:
+                added[pk] = 'forbidden'
+            elif pk not in targets:
+                added[pk] = 'not_found'
+            else:
+                added[pk] = 'exists' if pk in present else 'created'
+        candidates = [
+            pk for pk, result in added.items() if result == 'created'
+        ]
+        rows = self.insert_relations(candidates) if candidates else []
+        inserted = {pk for pk, _ in rows}
+        for pk in candidates:
+            if pk not in inserted:
+                added[pk] = 'exists'
+        return added, rows
+
+    def remove_relations(self, relations, remove):
+        target_id = f'{self.target_field}_id'
+        locked = dict(relations.select_for_update().filter(
+            **{f'{target_id}__in': remove}
+        ).values_list('pk', target_id))
+        # Обычный delete(): post_delete по строкам обновляет счетчики,
+        # сводки и версию кэша так же, как одиночное удаление.
+        self.model.objects.filter(pk__in=locked).delete()
+        deleted = set(locked.values())
+        return {
+            pk: 'deleted' if pk in deleted else 'absent' for pk in remove
+        }
+
+    def post(self, request):
+        serializer = serializers.BatchRelationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        forbidden = self.get_forbidden_ids(request)
+        with transaction.atomic():
+            relations = self.model.objects.filter(user=request.user)
+            added, created = self.add_relations(
+                relations, serializer.validated_data['add'], forbidden
+            )
+            removed = self.remove_relations(
+                relations, serializer.validated_data['remove']
+            )
+            if created:
+                self.update_counters(created)
+                cache_versions.bump(self.cache_namespace)
+        return Response({
+            'add': [{'id': pk, 'result': result}
+                    for pk, result in added.items()],
+            'remove': [{'id': pk, 'result': result}
+                       for pk, result in removed.items()],
+        })
+
+
+class FavouriteBatchView(BatchRelationView):
+    model = models.Favourite
+    cache_namespace = 'favourites'
+    target_model = models.Recipe
+    target_field = 'recipe'
+
+    def update_counters(self, rows):
+        refresh_favourites_count([pk for pk, _ in rows])
+        popularity.record_activities(rows, 'favourites')
+        author_stats.record_recipe_events(rows, 'favourites')
+
+
+class CartBatchView(BatchRelationView):
+    model = models.Cart
+    cache_namespace = 'carts'
+    target_model = models.Recipe
+    target_field = 'recipe'
+
+    def update_counters(self, rows):
+        popularity.record_activities(rows, 'carts')
+        author_stats.record_recipe_events(rows, 'carts')
+
+
+class FollowBatchView(BatchRelationView):
+    model = Follow
+    cache_namespace = 'follows'
+    target_model = User
+    target_field = 'author'
+
+    def update_counters(self, rows):
+        backfill_timeline(self.request.user.id, [pk for pk, _ in rows])
+        author_stats.record_follow_events(rows)
+
+    def get_forbidden_ids(self, request):
+        return {request.user.id}
@@ -0,0 +1,57 @@
+"""
+PostgreSQL с пулом соединений на процесс для воркеров gunicorn
+с потоками (--threads). Django закрывает соединение в конце каждого
+запроса, а этот бэкенд вместо закрытия возвращает его в пул.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+
+from foodgram.connections import PoolTimeoutError, get_pool
+
+Database = base.Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.settings_dict['CONN_MAX_AGE']:
+            raise ImproperlyConfigured(
+                'Пул соединений требует DB_CONN_MAX_AGE=0'
+            )
+
+    @staticmethod
+    def check_connection(connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def get_pool(self):
+        return get_pool(self.alias, self.check_connection)
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.get_pool().acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params
+                )
+            )
+        except PoolTimeoutError as error:
+            raise Database.OperationalError(str(error)) from error
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = not self.errors_occurred and not self.connection.closed
+        if reusable:
+            try:
+                self.connection.rollback()
+            except Database.Error:
+                reusable = False
+        self.get_pool().release(self.connection, reusable)
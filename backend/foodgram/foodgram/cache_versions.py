@@ -0,0 +1,72 @@
+"""
+Согласованность кэшей между воркерами. У каждого пространства имен
+(NAMESPACES) есть версия в таблице CacheVersion, сигналы моделей
+увеличивают ее после коммита. Ключ кэша включает версии пространств,
+от которых зависит значение, поэтому после изменения данных все воркеры
+перестают читать старое значение без коротких TTL. Версии читаются
+одним запросом и не чаще раза за HTTP-запрос.
+"""
+import threading
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from recipes.models import CacheVersion
+
+NAMESPACES = (
+    'recipes', 'tags', 'ingredients', 'users', 'follows', 'favourites',
+    'carts', 'popular',
+)
+
+_state = threading.local()
+
+
+def _bump(namespaces):
+    for namespace in namespaces:
+        versions = CacheVersion.objects.filter(namespace=namespace)
+        if versions.update(version=F('version') + 1):
+            continue
+        try:
+            with transaction.atomic():
+                CacheVersion.objects.create(namespace=namespace, version=2)
+        except IntegrityError:
+            versions.update(version=F('version') + 1)
+
+
+def bump(*namespaces):
+    """Увеличивает версии после коммита текущей транзакции."""
+    transaction.on_commit(lambda: _bump(namespaces))
+
+
+def get_versions():
+    versions = getattr(_state, 'versions', None)
+    if versions is None:
+        versions = dict(
+            CacheVersion.objects.values_list('namespace', 'version')
+        )
+        if getattr(_state, 'in_request', False):
+            _state.versions = versions
+    return versions
+
+
+def versioned_key(key, *namespaces):
+    versions = get_versions()
+    stamp = '.'.join(
+        str(versions.get(namespace, 1)) for namespace in namespaces
+    )
+    return f'{key}:v{stamp}'
+
+
+class CacheVersionMiddleware:
+    """Версии, прочитанные в запросе, живут до его конца."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.in_request = True
+        _state.versions = None
+        try:
+            return self.get_response(request)
+        finally:
+            _state.in_request = False
+            _state.versions = None
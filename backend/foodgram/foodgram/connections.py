@@ -0,0 +1,150 @@
+"""
+Управление соединениями с БД: проверка постоянных соединений
+(CONN_MAX_AGE > 0) перед запросом и пул для многопоточных воркеров,
+см. foodgram/backends/postgresql_pool.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from foodgram.metrics import (DB_CONNECTIONS_CLOSED, DB_CONNECTS,
+                              DB_POOL_OPENED, DB_POOL_TIMEOUTS, DB_POOL_WAIT)
+
+
+@receiver(connection_created)
+def count_connect(sender, connection, **kwargs):
+    DB_CONNECTS.labels(connection.alias).inc()
+
+
+class ConnectionHealthMiddleware:
+    """
+    Перед запросом проверяет постоянные соединения, которые простояли
+    дольше DB_HEALTH_CHECK_INTERVAL секунд. Мертвое соединение
+    закрывается, и Django откроет новое вместо ошибки посреди запроса.
+    """
+    def __init__(self, get_response):
+        if not settings.DB_HEALTH_CHECK_INTERVAL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    @staticmethod
+    def check(connection, now):
+        last_used = getattr(connection, 'last_used', None)
+        if (
+                connection.connection is None or last_used is None
+                or now - last_used < settings.DB_HEALTH_CHECK_INTERVAL
+        ):
+            return
+        if not connection.is_usable():
+            connection.close()
+            DB_CONNECTIONS_CLOSED.labels(
+                connection.alias, 'health_check'
+            ).inc()
+
+    def __call__(self, request):
+        now = time.monotonic()
+        for connection in connections.all():
+            self.check(connection, now)
+        try:
+            return self.get_response(request)
+        finally:
+            now = time.monotonic()
+            for connection in connections.all():
+                connection.last_used = now
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Пул не больше max_size соединений одного алиаса на процесс.
+    Свободные соединения выдаются в порядке LIFO, простоявшие дольше
+    health_check_interval перед выдачей проверяются функцией check
+    (0 — не проверять).
+    """
+    def __init__(self, alias, max_size, timeout, health_check_interval,
+                 check):
+        self.alias = alias
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.check = check
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.idle = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self, connect):
+        started = time.perf_counter()
+        if not self.slots.acquire(timeout=self.timeout):
+            DB_POOL_TIMEOUTS.labels(self.alias).inc()
+            raise PoolTimeoutError(
+                f'Нет свободного соединения с {self.alias} '
+                f'за {self.timeout} с'
+            )
+        DB_POOL_WAIT.labels(self.alias).observe(
+            time.perf_counter() - started
+        )
+        try:
+            return self.take_idle() or self.open(connect)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def take_idle(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, released = self.idle.pop()
+            idle_time = time.monotonic() - released
+            if (
+                    not self.health_check_interval
+                    or idle_time < self.health_check_interval
+                    or self.check(connection)
+            ):
+                return connection
+            self.discard(connection, 'health_check')
+
+    def open(self, connect):
+        connection = connect()
+        DB_POOL_OPENED.labels(self.alias).inc()
+        return connection
+
+    def release(self, connection, reusable=True):
+        if reusable:
+            with self.lock:
+                self.idle.append((connection, time.monotonic()))
+        else:
+            self.discard(connection, 'error')
+        self.slots.release()
+
+    def discard(self, connection, reason):
+        DB_CONNECTIONS_CLOSED.labels(self.alias, reason).inc()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, check):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                alias,
+                max_size=settings.DB_POOL_SIZE,
+                timeout=settings.DB_POOL_TIMEOUT,
+                health_check_interval=settings.DB_HEALTH_CHECK_INTERVAL,
+                check=check,
+            )
+        return _pools[alias]
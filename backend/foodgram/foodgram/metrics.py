@@ -0,0 +1,92 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if MULTIPROC_DIR:
+    # Каталог создает gunicorn, но процесс с той же переменной может
+    # запуститься без него или раньше него.
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+REQUEST_LATENCY = Histogram(
+    'foodgram_http_request_duration_seconds',
+    'Время обработки запроса',
+    ['route', 'method'],
+)
+RESPONSES = Counter(
+    'foodgram_http_responses_total',
+    'Количество ответов по статусам',
+    ['route', 'method', 'status'],
+)
+DB_QUERIES = Histogram(
+    'foodgram_http_db_queries',
+    'Количество SQL-запросов на один HTTP-запрос',
+    ['route', 'method'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200, float('inf')),
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total',
+    'Обращения к кешам приложения',
+    ['cache', 'result'],
+)
+
+DB_CONNECTS = Counter(
+    'foodgram_db_connects_total',
+    'Подключения Django к БД: новые соединения или взятые из пула',
+    ['alias'],
+)
+DB_CONNECTIONS_CLOSED = Counter(
+    'foodgram_db_connections_closed_total',
+    'Соединения, закрытые проверкой здоровья или после ошибки',
+    ['alias', 'reason'],
+)
+DB_POOL_OPENED = Counter(
+    'foodgram_db_pool_connections_opened_total',
+    'Новые физические соединения в пуле',
+    ['alias'],
+)
+DB_POOL_WAIT = Histogram(
+    'foodgram_db_pool_wait_seconds',
+    'Ожидание свободного соединения в пуле',
+    ['alias'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, float('inf')),
+)
+DB_POOL_TIMEOUTS = Counter(
+    'foodgram_db_pool_timeouts_total',
+    'Запросы, не дождавшиеся соединения из пула',
+    ['alias'],
+)
+
+
+def record_cache_access(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def metrics_view(request):
+    """
+    Метрики в текстовом формате Prometheus. При запуске под gunicorn
+    с PROMETHEUS_MULTIPROC_DIR значения собираются со всех воркеров.
+    Отдаются только с заголовком Authorization: Bearer <METRICS_TOKEN>,
+    без токена в настройках эндпоинта нет.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    expected = f'Bearer {settings.METRICS_TOKEN}'.encode()
+    supplied = request.META.get('HTTP_AUTHORIZATION', '').encode()
+    if not hmac.compare_digest(supplied, expected):
+        response = HttpResponse('Нужен токен метрик', status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,157 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from foodgram.metrics import DB_QUERIES, REQUEST_LATENCY, RESPONSES
+
+slow_request_logger = logging.getLogger('foodgram.slow_requests')
+
+
+class RequestMetrics:
+    """
+    Счетчики одного запроса: число и время SQL-запросов, время
+    сериализаторов, кодирования JSON и общее время.
+    Подключается к соединениям через connection.execute_wrapper.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.queries = Counter()
+        self.measuring = False
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries[sql] += 1
+
+    @contextmanager
+    def measure(self, attr):
+        """
+        Прибавляет к attr время блока без SQL-запросов внутри него.
+        Вложенные замеры (сериализатор внутри сериализатора) не считаются.
+        """
+        if self.measuring:
+            yield
+            return
+        self.measuring = True
+        started = time.perf_counter()
+        db_time = self.db_time
+        try:
+            yield
+        finally:
+            self.measuring = False
+            elapsed = time.perf_counter() - started - (self.db_time - db_time)
+            setattr(self, attr, getattr(self, attr) + elapsed)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        app_time = max(
+            self.total - self.db_time - self.serialize_time
+            - self.render_time,
+            0
+        )
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="{self.query_count} queries"',
+            f'serialize;dur={self.serialize_time * 1000:.1f};'
+            f'desc="serializers"',
+            f'render;dur={self.render_time * 1000:.1f};desc="JSON"',
+            f'app;dur={app_time * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ))
+
+
+def measure(request, attr):
+    """RequestMetrics.measure текущего запроса, если тайминг включен."""
+    metrics = getattr(request, 'metrics', None)
+    return nullcontext() if metrics is None else metrics.measure(attr)
+
+
+class RequestTimingMiddleware:
+    """
+    Добавляет в ответ заголовок Server-Timing, медленные запросы
+    вместе с их SQL пишет в лог foodgram.slow_requests.
+    При REQUEST_TIMING_ENABLED = False не подключается вовсе.
+    """
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_threshold = settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        metrics.finish()
+        response['Server-Timing'] = metrics.server_timing()
+        if metrics.total >= self.slow_threshold:
+            self.log_slow_request(request, response, metrics)
+        return response
+
+    @staticmethod
+    def log_slow_request(request, response, metrics):
+        statements = '\n'.join(
+            f'{count} x {sql}'
+            for sql, count in metrics.queries.most_common()
+        )
+        slow_request_logger.warning(
+            '%s %s %s: %.1f ms, %d queries (%.1f ms)\n%s',
+            request.method, request.get_full_path(), response.status_code,
+            metrics.total * 1000, metrics.query_count,
+            metrics.db_time * 1000, statements
+        )
+
+
+class MetricsMiddleware:
+    """
+    Пишет в foodgram.metrics латентность, статусы ответов и число
+    SQL-запросов в разрезе маршрута (view_name) и метода.
+    """
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = getattr(request, 'metrics', None)
+        with ExitStack() as stack:
+            if metrics is None:
+                metrics = RequestMetrics()
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics)
+                    )
+            started = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - started
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.view_name if resolver_match else 'unmatched'
+        REQUEST_LATENCY.labels(route, request.method).observe(duration)
+        RESPONSES.labels(
+            route, request.method, response.status_code
+        ).inc()
+        DB_QUERIES.labels(route, request.method).observe(
+            metrics.query_count
+        )
+        return response
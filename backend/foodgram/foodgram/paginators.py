@@ -0,0 +1,34 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Ниже этого числа строк оценка неточна, а COUNT(*) и так быстрый.
+ESTIMATE_MIN_ROWS = 10000
+
+
+def estimate_count(queryset):
+    """
+    Оценка числа строк нефильтрованной таблицы из статистики PostgreSQL
+    или None, если оценить нельзя.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where.children:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для админки: без фильтров не считает COUNT(*) по таблице."""
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+            return estimate
+        return super().count
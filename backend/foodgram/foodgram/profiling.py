@@ -0,0 +1,129 @@
+import cProfile
+import contextlib
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+PROFILE_SUFFIX = '.pstats'
+PROFILE_NAME_RE = re.compile(r'^[\w.-]+\.pstats$')
+
+
+def list_profiles():
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(settings.PROFILING_DIR):
+        if not name.endswith(PROFILE_SUFFIX):
+            continue
+        stat = os.stat(os.path.join(settings.PROFILING_DIR, name))
+        profiles.append({
+            'name': name,
+            'size': stat.st_size,
+            'created': stat.st_mtime,
+        })
+    return sorted(profiles, key=lambda item: item['created'], reverse=True)
+
+
+def get_profile_path(name):
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+class RateLimiter:
+    """Не больше limit событий за скользящее окно period секунд."""
+
+    def __init__(self, limit, period=60):
+        self.limit = limit
+        self.period = period
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        now = time.monotonic()
+        with self.lock:
+            while self.events and now - self.events[0] > self.period:
+                self.events.popleft()
+            if len(self.events) >= self.limit:
+                return False
+            self.events.append(now)
+            return True
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос через cProfile, если его прислал staff-пользователь
+    с заголовком X-Profile: 1 или параметром ?profile=1.
+    Захват ограничен PROFILING_SAMPLE_RATE и PROFILING_RATE_LIMIT
+    в минуту на воркер, результат сохраняется в PROFILING_DIR.
+    """
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rate_limiter = RateLimiter(settings.PROFILING_RATE_LIMIT)
+
+    @staticmethod
+    def is_requested(request):
+        return (
+            request.META.get('HTTP_X_PROFILE') == '1'
+            or request.GET.get('profile') == '1'
+        )
+
+    @staticmethod
+    def is_staff(request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        try:
+            credentials = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return credentials is not None and credentials[0].is_staff
+
+    def should_profile(self, request):
+        return (
+            self.is_requested(request)
+            and random.random() < settings.PROFILING_SAMPLE_RATE
+            and self.is_staff(request)
+            and self.rate_limiter.acquire()
+        )
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        name = self.save(request, profiler)
+        response['X-Profile-Id'] = name
+        return response
+
+    @staticmethod
+    def save(request, profiler):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path_slug = re.sub(r'[^\w]+', '-', request.path).strip('-')
+        name = (
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-'
+            f'{path_slug}-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}'
+        )
+        profiler.dump_stats(os.path.join(settings.PROFILING_DIR, name))
+        for stale in list_profiles()[settings.PROFILING_KEEP:]:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(
+                    os.path.join(settings.PROFILING_DIR, stale['name'])
+                )
+        return name
@@ -0,0 +1,100 @@
+"""
+Чтение с реплик. ReplicaRoutingMiddleware разрешает безопасным запросам
+к /api/ читать с одной из DATABASE_REPLICAS, ReplicaRouter направляет
+туда чтения, все остальное идет в default. После успешной записи
+пользователь REPLICA_STICKY_SECONDS читает только с default со всех
+своих клиентов, чтобы видеть свои изменения, пока реплика догоняет.
+Отметка хранится в PrimaryPin в основной базе и ищется по токену
+из заголовка: токен у пользователя один, а DRF проверяет его позже.
+Токены тоже читаются только с default, иначе сразу после входа
+реплика может их еще не знать.
+"""
+import random
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from recipes.models import PrimaryPin
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+TOKEN_PREFIX = 'Token '
+PRIMARY_MODELS = ('authtoken.Token', 'recipes.PrimaryPin')
+
+_state = threading.local()
+
+
+def get_read_replica():
+    """Реплика текущего запроса или None, если читать надо с default."""
+    replica = getattr(_state, 'replica', None)
+    if replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return None
+    return replica
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.label in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return get_read_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    @staticmethod
+    def is_pinned(request):
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not header.startswith(TOKEN_PREFIX):
+            return False
+        return PrimaryPin.objects.filter(
+            user__auth_token__key=header[len(TOKEN_PREFIX):].strip(),
+            until__gt=timezone.now(),
+        ).exists()
+
+    def can_use_replica(self, request):
+        return (
+            request.method in SAFE_METHODS
+            and request.path.startswith('/api/')
+            and not self.is_pinned(request)
+        )
+
+    @staticmethod
+    def pin(request, response):
+        """Закрепляет пользователя за default после успешной записи."""
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        # DRF после аутентификации проставляет user исходному запросу.
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return
+        PrimaryPin.objects.update_or_create(
+            user_id=user.pk, defaults={'until': timezone.now() + timedelta(
+                seconds=settings.REPLICA_STICKY_SECONDS
+            )}
+        )
+
+    def __call__(self, request):
+        if self.can_use_replica(request):
+            _state.replica = random.choice(settings.DATABASE_REPLICAS)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.replica = None
+        self.pin(request, response)
+        return response
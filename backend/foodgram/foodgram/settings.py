@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -35,6 +36,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.RequestTimingMiddleware',
+    'foodgram.middleware.MetricsMiddleware',
+    'foodgram.replicas.ReplicaRoutingMiddleware',
+    'foodgram.connections.ConnectionHealthMiddleware',
+    'foodgram.cache_versions.CacheVersionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'foodgram.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -65,17 +72,59 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 
+DB_ENGINE = os.getenv('DB_ENGINE', default='django.db.backends.postgresql')
+
+# Тестовая база SQLite — файл, а не память: в базу в памяти нельзя писать
+# из нескольких потоков, а тесты конкурентных запросов это делают.
+# Для PostgreSQL по умолчанию берется test_<DB_NAME>.
+DB_TEST_NAME = os.getenv('DB_TEST_NAME')
+if DB_TEST_NAME is None and 'sqlite' in DB_ENGINE:
+    DB_TEST_NAME = os.path.join(
+        tempfile.gettempdir(), 'foodgram_test.sqlite3'
+    )
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': DB_ENGINE,
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Для пула (DB_ENGINE=foodgram.backends.postgresql_pool) нужен 0.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'TEST': {'NAME': DB_TEST_NAME},
     }
 }
 
+DB_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_HEALTH_CHECK_INTERVAL', 30))
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+
+# Реплики для чтения: для PostgreSQL — хосты host[:port] через запятую,
+# для SQLite — пути к копиям базы.
+DATABASE_REPLICAS = []
+
+for number, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1
+):
+    alias = f'replica_{number}'
+    if 'sqlite' in DATABASES['default']['ENGINE']:
+        location = {'NAME': replica}
+    else:
+        host, _, port = replica.partition(':')
+        location = {'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    DATABASES[alias] = {
+        **DATABASES['default'], **location, 'TEST': {'MIRROR': 'default'}
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.replicas.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -96,7 +145,11 @@ REST_FRAMEWORK = {
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.TokenAuthentication',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 
 }
 
@@ -128,6 +181,72 @@ AUTH_USER_MODEL = 'users.User'
 
 EMPTY_VALUE_DISPLAY = '-пусто-'
 
+REQUEST_TIMING_ENABLED = os.getenv('REQUEST_TIMING_ENABLED') == 'True'
+
+SLOW_REQUEST_THRESHOLD_MS = int(os.getenv('SLOW_REQUEST_THRESHOLD_MS', 500))
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED') == 'True'
+
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 1.0))
+
+PROFILING_RATE_LIMIT = int(os.getenv('PROFILING_RATE_LIMIT', 6))
+
+PROFILING_KEEP = 100
+
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles/')
+)
+
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 5000)
+)
+
+FEED_TIMELINE_LENGTH = int(os.getenv('FEED_TIMELINE_LENGTH', 500))
+
+UPLOAD_FILE_MAX_SIZE = int(os.getenv('UPLOAD_FILE_MAX_SIZE', 10 * 2 ** 20))
+
+RECIPE_IMAGE_MAX_SIDE = int(os.getenv('RECIPE_IMAGE_MAX_SIDE', 8000))
+
+IMPORT_DIR = os.getenv(
+    'IMPORT_DIR', default=os.path.join(BASE_DIR, 'import/')
+)
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 500))
+
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', 5000))
+
+TASKS_EAGER = os.getenv('TASKS_EAGER') == 'True'
+
+TASK_LEASE_SECONDS = int(os.getenv('TASK_LEASE_SECONDS', 600))
+
+TASK_RETRY_DELAY = int(os.getenv('TASK_RETRY_DELAY', 30))
+
+TASK_KEEP_DAYS = 7
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram.slow_requests': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+        'foodgram.tasks': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=28),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -0,0 +1,249 @@
+"""
+Фоновые задачи без внешнего брокера. Очередь — таблица Task,
+задачи объявляются декоратором @task в модулях tasks.py приложений
+и ставятся в очередь через func.enqueue(*args, dedup_key=..., run_at=...).
+Команда run_worker забирает готовые задачи условным UPDATE (безопасно
+для нескольких воркеров) в аренду на TASK_LEASE_SECONDS, выполняет их
+в пуле потоков или процессов, продлевая аренду, пока задача работает,
+повторяет упавшие с экспоненциальной задержкой (кроме упавших
+с PermanentError) и сама ставит периодические задачи. Итог
+записывается, только если аренда все еще у этого воркера. Задача,
+чей воркер умер, снова забирается после истечения аренды, пока
+не кончатся попытки. При TASKS_EAGER = True задачи выполняются сразу
+после коммита, без очереди.
+"""
+import json
+import logging
+import threading
+import traceback
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from recipes.models import Task
+
+logger = logging.getLogger('foodgram.tasks')
+
+
+class PermanentError(Exception):
+    """Задача упала так, что повтор не поможет: сразу статус «Ошибка»."""
+
+
+TaskSpec = namedtuple('TaskSpec', ('func', 'periodic', 'max_attempts'))
+
+_registry = {}
+
+
+def task(periodic=None, max_attempts=3):
+    """periodic — timedelta, с которой воркер сам ставит задачу."""
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+        _registry[name] = TaskSpec(func, periodic, max_attempts)
+
+        def enqueue_task(*args, dedup_key=None, run_at=None, **kwargs):
+            return enqueue(name, args, kwargs, dedup_key, run_at)
+
+        func.task_name = name
+        func.enqueue = enqueue_task
+        return func
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, dedup_key=None, run_at=None):
+    """
+    Ставит задачу в очередь в текущей транзакции. Если задача с тем же
+    dedup_key уже ждет в очереди, новая не создается и возвращается None.
+    """
+    spec = _registry[name]
+    kwargs = kwargs or {}
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: spec.func(*args, **kwargs))
+        return None
+    try:
+        with transaction.atomic():
+            return Task.objects.create(
+                name=name,
+                payload=json.dumps({'args': list(args), 'kwargs': kwargs}),
+                dedup_key=dedup_key,
+                run_at=run_at or timezone.now(),
+                max_attempts=spec.max_attempts,
+            )
+    except IntegrityError:
+        return None
+
+
+def load_tasks():
+    autodiscover_modules('tasks')
+
+
+def init_process():
+    """Инициализация процесса пула: Django и реестр задач."""
+    django.setup()
+    load_tasks()
+
+
+def schedule_periodic():
+    now = timezone.now()
+    for name, spec in _registry.items():
+        if spec.periodic is None:
+            continue
+        ran_before = Task.objects.filter(name=name).exists()
+        enqueue(
+            name, dedup_key=f'periodic:{name}',
+            run_at=now + spec.periodic if ran_before else now
+        )
+
+
+def lease_deadline():
+    return timezone.now() + timedelta(seconds=settings.TASK_LEASE_SECONDS)
+
+
+def fail_abandoned(now):
+    """Задачи с истекшей арендой и без попыток: их воркер умер."""
+    Task.objects.filter(
+        status=Task.RUNNING, locked_until__lt=now,
+        attempts__gte=F('max_attempts')
+    ).update(
+        status=Task.FAILED, finished=now, locked_until=None, lease=None,
+        last_error='Аренда истекла, попытки исчерпаны'
+    )
+
+
+def claim(limit):
+    """
+    Забирает до limit готовых задач, в том числе с истекшей арендой,
+    и возвращает пары (id, метка аренды).
+    """
+    now = timezone.now()
+    fail_abandoned(now)
+    ready = (
+        Q(status=Task.PENDING, run_at__lte=now)
+        | Q(
+            status=Task.RUNNING, locked_until__lt=now,
+            attempts__lt=F('max_attempts')
+        )
+    )
+    candidates = Task.objects.filter(ready).order_by(
+        'run_at'
+    ).values_list('id', flat=True)[:limit * 2]
+    claimed = []
+    for pk in candidates:
+        lease = uuid.uuid4().hex
+        if Task.objects.filter(ready, pk=pk).update(
+                status=Task.RUNNING, attempts=F('attempts') + 1,
+                locked_until=lease_deadline(), lease=lease,
+        ):
+            claimed.append((pk, lease))
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def renew_lease(task_id, lease):
+    """Продлевает аренду; 0 — задачу уже забрал другой воркер."""
+    return Task.objects.filter(
+        pk=task_id, status=Task.RUNNING, lease=lease
+    ).update(locked_until=lease_deadline())
+
+
+@contextmanager
+def heartbeat(task_id, lease):
+    """Продлевает аренду каждую треть TASK_LEASE_SECONDS в своем потоке."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.TASK_LEASE_SECONDS / 3):
+                try:
+                    if not renew_lease(task_id, lease):
+                        logger.warning('Задача #%s потеряла аренду', task_id)
+                        return
+                except DatabaseError:
+                    logger.exception(
+                        'Не удалось продлить аренду задачи #%s', task_id
+                    )
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def fail(task, error, permanent=False):
+    now = timezone.now()
+    tasks = Task.objects.filter(pk=task.pk, lease=task.lease)
+    if permanent or task.attempts >= task.max_attempts:
+        tasks.update(
+            status=Task.FAILED, last_error=error, finished=now,
+            locked_until=None, lease=None
+        )
+        return
+    delay = settings.TASK_RETRY_DELAY * 2 ** (task.attempts - 1)
+    try:
+        with transaction.atomic():
+            tasks.update(
+                status=Task.PENDING, last_error=error, locked_until=None,
+                lease=None, run_at=now + timedelta(seconds=delay)
+            )
+    except IntegrityError:
+        tasks.update(
+            status=Task.FAILED, finished=now, locked_until=None, lease=None,
+            last_error=f'{error}\nВ очереди уже есть задача '
+                       f'с ключом {task.dedup_key}'
+        )
+
+
+def execute(task_id, lease):
+    """Выполняет одну задачу в потоке или процессе пула."""
+    try:
+        task = Task.objects.filter(
+            pk=task_id, status=Task.RUNNING, lease=lease
+        ).first()
+        if task is None:
+            return
+        spec = _registry.get(task.name)
+        try:
+            if spec is None:
+                raise LookupError(f'Неизвестная задача {task.name}')
+            payload = json.loads(task.payload)
+            with heartbeat(task.pk, lease):
+                spec.func(*payload['args'], **payload['kwargs'])
+        except Exception as error:
+            logger.exception('Задача %s #%s упала', task.name, task.pk)
+            fail(
+                task, traceback.format_exc(),
+                permanent=isinstance(error, PermanentError)
+            )
+        else:
+            if not Task.objects.filter(pk=task.pk, lease=lease).update(
+                    status=Task.DONE, finished=timezone.now(),
+                    locked_until=None, lease=None
+            ):
+                logger.warning(
+                    'Задача %s #%s выполнена, но аренда уже у другого '
+                    'воркера', task.name, task.pk
+                )
+    finally:
+        connections.close_all()
+
+
+@task(periodic=timedelta(days=1))
+def purge_finished_tasks():
+    """Удаляет выполненные задачи старше TASK_KEEP_DAYS."""
+    Task.objects.filter(
+        status=Task.DONE,
+        finished__lt=timezone.now() - timedelta(days=settings.TASK_KEEP_DAYS)
+    ).delete()
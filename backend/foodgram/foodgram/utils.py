@@ -0,0 +1,10 @@
+from itertools import islice
+
+
+def chunks(iterable, size):
+    """Списки по size элементов, не читая итератор целиком."""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
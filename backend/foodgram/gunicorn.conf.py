@@ -0,0 +1,21 @@
+import os
+import shutil
+
+# Воркеры gunicorn пишут метрики в общий каталог, чтобы /metrics/ собирал
+# их со всех процессов. Переменная задается только для gunicorn и до
+# импорта prometheus_client: остальные команды образа (migrate,
+# run_worker) держат метрики в памяти.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+
+def on_starting(server):
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
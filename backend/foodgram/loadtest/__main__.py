@@ -0,0 +1,178 @@
+"""
+Нагрузочный тест Foodgram: воспроизводит взвешенную смесь
+пользовательских сценариев против запущенного сервера.
+
+    python -m loadtest --base-url http://localhost:8000 \\
+        --concurrency 20 --duration 60 --mix browse_anonymous=50,login=5
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from loadtest.flows import (DEFAULT_MIX, FLOWS, Catalog, Client, FlowError,
+                            choose_flow)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in FLOWS:
+            raise argparse.ArgumentTypeError(f'Неизвестный сценарий: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(percent / 100 * len(values))))
+    return values[index]
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = defaultdict(set)
+
+    def record(self, flow, duration, error=None):
+        with self.lock:
+            self.latencies[flow].append(duration)
+            if error is not None:
+                self.errors[flow] += 1
+                if len(self.error_samples[flow]) < 5:
+                    self.error_samples[flow].add(str(error))
+
+    def report(self, elapsed):
+        report = {}
+        for flow, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            report[flow] = {
+                'count': len(values),
+                'throughput': len(values) / elapsed,
+                'error_rate': self.errors[flow] / len(values),
+                'max_ms': values[-1] * 1000,
+                'errors': sorted(self.error_samples[flow]),
+            }
+            for percent in PERCENTILES:
+                report[flow][f'p{percent}_ms'] = (
+                    percentile(values, percent) * 1000
+                )
+        return report
+
+
+def create_accounts(base_url, count):
+    run_id = uuid.uuid4().hex[:8]
+    clients = []
+    for index in range(count):
+        account = {
+            'email': f'loadtest-{run_id}-{index}@example.com',
+            'username': f'loadtest-{run_id}-{index}',
+            'first_name': 'Load',
+            'last_name': 'Test',
+            'password': f'Lt-{uuid.uuid4().hex}',
+        }
+        client = Client(requests.Session(), base_url, account)
+        client.request(
+            'POST', '/api/users/', json=account, expected=(201, )
+        )
+        client.login()
+        clients.append(client)
+    return clients
+
+
+def worker(client, catalog, mix, deadline, stats, seed):
+    rnd = random.Random(seed)
+    while time.monotonic() < deadline:
+        flow = choose_flow(mix, rnd)
+        started = time.perf_counter()
+        try:
+            FLOWS[flow](client, catalog, rnd)
+        except (FlowError, requests.RequestException) as error:
+            stats.record(flow, time.perf_counter() - started, error)
+        else:
+            stats.record(flow, time.perf_counter() - started)
+
+
+def cleanup(clients):
+    for client in clients:
+        for recipe_id in client.created_recipes:
+            client.request(
+                'DELETE', f'/api/recipes/{recipe_id}/', expected=(204, 404)
+            )
+
+
+def print_report(report, elapsed):
+    header = (
+        f'{"flow":<26}{"count":>8}{"rps":>9}{"err%":>7}'
+        + ''.join(f'{f"p{percent}":>9}' for percent in PERCENTILES)
+        + f'{"max":>9}'
+    )
+    print(f'Длительность: {elapsed:.1f} с')
+    print(header)
+    for flow, row in report.items():
+        print(
+            f'{flow:<26}{row["count"]:>8}{row["throughput"]:>9.1f}'
+            f'{row["error_rate"] * 100:>7.1f}'
+            + ''.join(
+                f'{row[f"p{percent}_ms"]:>9.0f}' for percent in PERCENTILES
+            )
+            + f'{row["max_ms"]:>9.0f}'
+        )
+        for error in row['errors']:
+            print(f'    {error}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument(
+        '--json', dest='json_path', help='Сохранить отчет в JSON-файл'
+    )
+    args = parser.parse_args()
+
+    seeds = random.Random(args.seed)
+    clients = create_accounts(args.base_url, args.concurrency)
+    catalog = Catalog.load(clients[0])
+    if not catalog.recipe_ids:
+        parser.error('На сервере нет рецептов, загрузите db.json')
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.duration
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [
+            executor.submit(
+                worker, client, catalog, args.mix, deadline, stats,
+                seeds.random()
+            )
+            for client in clients
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.monotonic() - started
+    cleanup(clients)
+
+    report = stats.report(elapsed)
+    print_report(report, elapsed)
+    if args.json_path:
+        with open(args.json_path, 'w') as report_file:
+            json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
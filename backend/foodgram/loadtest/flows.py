@@ -0,0 +1,194 @@
+"""
+Сценарии нагрузочного теста: каждый повторяет последовательность
+запросов, которую делает фронтенд в соответствующем пользовательском пути.
+"""
+import random
+
+# Прозрачный PNG 1x1 — минимальная картинка для создания рецепта.
+TINY_PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAA'
+    'ADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+INGREDIENT_PREFIXES = (
+    'са', 'мо', 'ку', 'ка', 'по', 'лу', 'то', 'яй', 'ма', 'ри',
+)
+
+
+class FlowError(Exception):
+    pass
+
+
+class Client:
+    """Обертка над requests.Session виртуального пользователя."""
+
+    def __init__(self, session, base_url, account=None):
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.account = account
+        self.token = None
+        self.created_recipes = []
+
+    def request(self, method, path, expected=(200, ), **kwargs):
+        headers = kwargs.pop('headers', {})
+        if self.token is not None:
+            headers['Authorization'] = f'Token {self.token}'
+        response = self.session.request(
+            method, self.base_url + path, headers=headers, **kwargs
+        )
+        if response.status_code not in expected:
+            raise FlowError(f'{method} {path}: {response.status_code}')
+        return response
+
+    def login(self):
+        response = self.request(
+            'POST', '/api/auth/token/login/',
+            json={
+                'email': self.account['email'],
+                'password': self.account['password'],
+            },
+            expected=(200, 201),
+        )
+        self.token = response.json()['auth_token']
+
+
+class Catalog:
+    """Справочные данные, собранные один раз перед запуском."""
+
+    def __init__(self, tags, recipe_ids, ingredient_ids, pages):
+        self.tags = tags
+        self.tag_ids = list(tags.values())
+        self.recipe_ids = recipe_ids
+        self.ingredient_ids = ingredient_ids
+        self.pages = pages
+
+    @classmethod
+    def load(cls, client, page_size=6):
+        tags = {tag['slug']: tag['id'] for tag in client.request(
+            'GET', '/api/tags/'
+        ).json()}
+        recipes = client.request(
+            'GET', '/api/recipes/', params={'limit': 10, 'fields': 'id'}
+        ).json()
+        recipe_ids = [recipe['id'] for recipe in recipes['results']]
+        ingredient_ids = [ingredient['id'] for ingredient in client.request(
+            'GET', '/api/ingredients/', params={'name': 'са'}
+        ).json()]
+        pages = max(1, -(-recipes['count'] // page_size))
+        return cls(tags, recipe_ids, ingredient_ids, pages)
+
+
+def browse_anonymous(client, catalog, rnd):
+    anonymous = Client(client.session, client.base_url)
+    params = {'page': rnd.randint(1, catalog.pages), 'limit': 6}
+    if catalog.tags:
+        params['tags'] = rnd.sample(
+            list(catalog.tags), rnd.randint(1, len(catalog.tags))
+        )
+    recipes = anonymous.request(
+        'GET', '/api/recipes/', params=params
+    ).json()['results']
+    if recipes:
+        anonymous.request(
+            'GET', f'/api/recipes/{rnd.choice(recipes)["id"]}/'
+        )
+
+
+def login(client, catalog, rnd):
+    client.login()
+
+
+def toggle_favourite(client, catalog, rnd):
+    recipe_id = rnd.choice(catalog.recipe_ids)
+    client.request(
+        'POST', f'/api/recipes/{recipe_id}/favorite/', expected=(201, 400)
+    )
+    client.request(
+        'DELETE', f'/api/recipes/{recipe_id}/favorite/',
+        expected=(204, 404)
+    )
+
+
+def toggle_cart(client, catalog, rnd):
+    recipe_id = rnd.choice(catalog.recipe_ids)
+    client.request(
+        'POST', f'/api/recipes/{recipe_id}/shopping_cart/',
+        expected=(201, 400)
+    )
+    client.request(
+        'DELETE', f'/api/recipes/{recipe_id}/shopping_cart/',
+        expected=(204, 404)
+    )
+
+
+def subscriptions(client, catalog, rnd):
+    client.request(
+        'GET', '/api/users/subscriptions/',
+        params={'page': 1, 'limit': 6, 'recipes_limit': 3}
+    )
+
+
+def ingredient_autocomplete(client, catalog, rnd):
+    prefix = rnd.choice(INGREDIENT_PREFIXES)
+    for length in range(1, len(prefix) + 1):
+        client.request(
+            'GET', '/api/ingredients/', params={'name': prefix[:length]}
+        )
+
+
+def create_recipe(client, catalog, rnd):
+    ingredients = rnd.sample(
+        catalog.ingredient_ids, min(3, len(catalog.ingredient_ids))
+    )
+    response = client.request(
+        'POST', '/api/recipes/',
+        json={
+            'name': f'Нагрузочный рецепт {rnd.randint(1, 10 ** 6)}',
+            'text': 'Создан нагрузочным тестом',
+            'cooking_time': rnd.randint(1, 120),
+            'image': TINY_PNG,
+            'tags': rnd.sample(catalog.tag_ids, 1),
+            'ingredients': [
+                {'id': pk, 'amount': rnd.randint(1, 500)}
+                for pk in ingredients
+            ],
+        },
+        expected=(201, ),
+    )
+    client.created_recipes.append(response.json()['id'])
+
+
+def download_shopping_cart(client, catalog, rnd):
+    recipe_id = rnd.choice(catalog.recipe_ids)
+    client.request(
+        'POST', f'/api/recipes/{recipe_id}/shopping_cart/',
+        expected=(201, 400)
+    )
+    client.request('GET', '/api/recipes/download_shopping_cart/')
+
+
+FLOWS = {
+    'browse_anonymous': browse_anonymous,
+    'login': login,
+    'toggle_favourite': toggle_favourite,
+    'toggle_cart': toggle_cart,
+    'subscriptions': subscriptions,
+    'ingredient_autocomplete': ingredient_autocomplete,
+    'create_recipe': create_recipe,
+    'download_shopping_cart': download_shopping_cart,
+}
+
+DEFAULT_MIX = {
+    'browse_anonymous': 40,
+    'ingredient_autocomplete': 15,
+    'toggle_favourite': 10,
+    'toggle_cart': 10,
+    'subscriptions': 8,
+    'login': 5,
+    'download_shopping_cart': 5,
+    'create_recipe': 2,
+}
+
+
+def choose_flow(mix, rnd=random):
+    names = list(mix)
+    return rnd.choices(names, weights=[mix[name] for name in names])[0]
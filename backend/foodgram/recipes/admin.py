@@ -1,7 +1,30 @@
 from django.conf import settings
 from django.contrib import admin
+from django.utils.html import format_html
 
+from foodgram.paginators import EstimatedCountPaginator
 from recipes import models
+from users.models import User
+
+
+class AuthorFilter(admin.SimpleListFilter):
+    """
+    Фильтр по автору без списка всех авторов: значение задается
+    ссылкой из колонки автора, в панели видно только выбранного.
+    """
+    title = 'Автор'
+    parameter_name = 'author'
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        if not value or not value.isdigit():
+            return ()
+        return User.objects.filter(pk=value).values_list('pk', 'email')
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(author_id=self.value())
+        return queryset
 
 
 @admin.register(models.Ingredient)
@@ -10,7 +33,9 @@ class IngredientAdmin(admin.ModelAdmin):
         'name',
         'measurement_unit',
     )
-    list_filter = ('name',)
+    search_fields = ('^name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
 
@@ -32,16 +57,27 @@ class TagAdmin(admin.ModelAdmin):
 class RecipeAdmin(admin.ModelAdmin):
     list_display = (
         'name',
-        'author',
+        'author_link',
+        'favourites_count',
+        'pub_date',
     )
-    readonly_fields = ('favorite_amount',)
+    list_select_related = ('author',)
+    readonly_fields = ('favourites_count',)
+    autocomplete_fields = ('author', 'ingredients')
     search_fields = (
         'name',
     )
-    list_filter = ('name', 'author', 'tags')
+    list_filter = (AuthorFilter, 'tags')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def author_link(self, obj):
+        return format_html(
+            '<a href="?author={}">{}</a>', obj.author_id, obj.author
+        )
 
-    def favorite_amount(self, obj):
-        return obj.favourites.count()
+    author_link.short_description = 'Автор'
+    author_link.admin_order_field = 'author'
 
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
@@ -52,6 +88,10 @@ class FavouriteAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(models.Cart)
@@ -60,6 +100,10 @@ class CartAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(models.IngredientAmount)
@@ -68,3 +112,31 @@ class IngredientAmountAdmin(admin.ModelAdmin):
         'ingredient',
         'amount',
     )
+    list_select_related = ('ingredient',)
+    autocomplete_fields = ('ingredient',)
+    search_fields = ('^ingredient__name',)
+    ordering = ('ingredient__name', 'amount')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # __str__ показывает ингредиент, в том числе в автодополнении.
+        return super().get_queryset(request).select_related('ingredient')
+
+
+@admin.register(models.Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'finished',
+    )
+    list_filter = ('status',)
+    search_fields = (
+        'name',
+        'dedup_key',
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,176 @@
+"""
+Статистика автора для GET /api/users/me/stats/. Добавление рецепта
+в избранное или в покупки увеличивает дневную сводку DailyRecipeStats,
+подписка на автора — DailyFollowerStats; удаление уменьшает сводку
+того дня, когда запись была создана. Поэтому сводка за день — сколько
+добавлений этого дня еще на месте, и ее можно в любой момент пересобрать
+из исходных таблиц командой backfill_author_stats. Ответ собирается
+из двух чтений по индексам (author, day).
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from foodgram.utils import chunks
+from recipes.counters import increment
+from recipes.models import DailyFollowerStats, DailyRecipeStats, Recipe
+from recipes.popularity import ACTIVITY_FIELDS
+from users.models import Follow, User
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 365
+BACKFILL_CHUNK_SIZE = 500
+
+
+def record_recipe_event(recipe_ids, moment, field, delta=1):
+    day = timezone.localdate(moment)
+    if delta < 0:
+        # Уменьшение не создает строк, автор рецепта не нужен.
+        authors = dict.fromkeys(recipe_ids)
+    else:
+        authors = dict(Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).values_list('pk', 'author_id'))
+    for recipe_id, author_id in authors.items():
+        increment(
+            DailyRecipeStats, field, delta,
+            defaults={'author_id': author_id}, recipe_id=recipe_id, day=day
+        )
+
+
+def record_follow_event(author_ids, moment, delta=1):
+    day = timezone.localdate(moment)
+    for author_id in author_ids:
+        increment(
+            DailyFollowerStats, 'followers', delta,
+            author_id=author_id, day=day
+        )
+
+
+def group_by_day(rows):
+    """Пары (id, момент) в [(момент, [id])] по локальным дням."""
+    days = {}
+    for pk, moment in rows:
+        days.setdefault(timezone.localdate(moment), (moment, []))[1].append(pk)
+    return days.values()
+
+
+def record_recipe_events(rows, field, delta=1):
+    """record_recipe_event для пар (id рецепта, момент)."""
+    for moment, recipe_ids in group_by_day(rows):
+        record_recipe_event(recipe_ids, moment, field, delta)
+
+
+def record_follow_events(rows, delta=1):
+    """record_follow_event для пар (id автора, момент)."""
+    for moment, author_ids in group_by_day(rows):
+        record_follow_event(author_ids, moment, delta)
+
+
+def rebuild_author_stats(author_ids):
+    DailyRecipeStats.objects.filter(author_id__in=author_ids).delete()
+    DailyFollowerStats.objects.filter(author_id__in=author_ids).delete()
+    stats = {}
+    for model, field in ACTIVITY_FIELDS.items():
+        for row in model.objects.filter(
+                recipe__author_id__in=author_ids
+        ).annotate(day=TruncDate('created')).order_by().values(
+            'recipe_id', 'recipe__author_id', 'day'
+        ).annotate(total=Count('id')):
+            key = (row['recipe_id'], row['day'])
+            if key not in stats:
+                stats[key] = DailyRecipeStats(
+                    author_id=row['recipe__author_id'],
+                    recipe_id=row['recipe_id'], day=row['day']
+                )
+            setattr(stats[key], field, row['total'])
+    DailyRecipeStats.objects.bulk_create(stats.values(), batch_size=1000)
+    DailyFollowerStats.objects.bulk_create(
+        [
+            DailyFollowerStats(
+                author_id=row['author_id'], day=row['day'],
+                followers=row['total']
+            )
+            for row in Follow.objects.filter(
+                author_id__in=author_ids
+            ).annotate(day=TruncDate('created')).order_by().values(
+                'author_id', 'day'
+            ).annotate(total=Count('id'))
+        ],
+        batch_size=1000
+    )
+
+
+def backfill_author_stats(author_ids=None):
+    """Пересобирает сводки указанных авторов или всех, пачками."""
+    authors = User.objects.order_by('pk').values_list('pk', flat=True)
+    if author_ids is not None:
+        authors = authors.filter(pk__in=author_ids)
+    total = 0
+    for chunk in chunks(authors.iterator(), BACKFILL_CHUNK_SIZE):
+        with transaction.atomic():
+            rebuild_author_stats(chunk)
+        total += len(chunk)
+    return total
+
+
+def empty_point():
+    return {'favourites': 0, 'carts': 0, 'followers': 0}
+
+
+def collect_recipes(author_id, since, series):
+    recipes = {}
+    # Удаления не стирают строки сводки, а доводят их до нуля.
+    for recipe_id, name, day, favourites, carts in (
+            DailyRecipeStats.objects.filter(
+                author_id=author_id, day__gte=since
+            ).exclude(favourites=0, carts=0).order_by('day').values_list(
+                'recipe_id', 'recipe__name', 'day', 'favourites', 'carts'
+            )
+    ):
+        point = series.setdefault(day, empty_point())
+        point['favourites'] += favourites
+        point['carts'] += carts
+        recipe = recipes.setdefault(recipe_id, {
+            'id': recipe_id, 'name': name,
+            'favourites': 0, 'carts': 0, 'days': [],
+        })
+        recipe['favourites'] += favourites
+        recipe['carts'] += carts
+        recipe['days'].append(
+            {'date': day, 'favourites': favourites, 'carts': carts}
+        )
+    return sorted(
+        recipes.values(),
+        key=lambda recipe: (
+            -recipe['favourites'] - recipe['carts'], recipe['id']
+        )
+    )
+
+
+def get_author_stats(author_id, days=DEFAULT_DAYS):
+    """
+    Ряд по дням за последние days дней (без пропусков) и сводка
+    по рецептам автора с ненулевыми днями.
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    series = {since + timedelta(days=n): empty_point() for n in range(days)}
+    recipes = collect_recipes(author_id, since, series)
+    for day, followers in DailyFollowerStats.objects.filter(
+            author_id=author_id, day__gte=since
+    ).values_list('day', 'followers'):
+        series.setdefault(day, empty_point())['followers'] += followers
+    return {
+        'since': since,
+        'totals': {
+            field: sum(point[field] for point in series.values())
+            for field in empty_point()
+        },
+        'days': [
+            dict(point, date=day) for day, point in sorted(series.items())
+        ],
+        'recipes': recipes,
+    }
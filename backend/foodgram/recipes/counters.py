@@ -0,0 +1,40 @@
+"""
+Денормализованный счетчик Recipe.favourites_count для сортировки
+рецептов по популярности без подсчета избранного на каждый запрос
+и инкремент счетчиков в сводных таблицах.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favourite, Recipe
+
+
+def refresh_favourites_count(recipe_ids):
+    """Пересчитывает счетчик одним UPDATE: повторный вызов безопасен."""
+    counts = Favourite.objects.filter(recipe=OuterRef('pk')).order_by().values(
+        'recipe'
+    ).annotate(total=Count('id')).values('total')
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        favourites_count=Coalesce(
+            Subquery(counts, output_field=IntegerField()), 0
+        )
+    )
+
+
+def increment(model, field, delta, defaults=None, **lookup):
+    """
+    Прибавляет delta к полю field строки model с ключом lookup.
+    Строку создает только положительная delta: если сводку уже удалили
+    вместе с объектом, уменьшать нечего.
+    """
+    rows = model.objects.filter(**lookup)
+    if rows.update(**{field: F(field) + delta}) or delta < 0:
+        return
+    values = dict(lookup, **(defaults or {}))
+    values[field] = delta
+    try:
+        with transaction.atomic():
+            model.objects.create(**values)
+    except IntegrityError:
+        rows.update(**{field: F(field) + delta})
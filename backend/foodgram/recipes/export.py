@@ -0,0 +1,129 @@
+"""
+Выгрузка рецептов и социальных данных для аналитики в NDJSON, сжатом
+gzip: одна строка — один объект с полем type. Таблицы читаются
+iterator(chunk_size) — на PostgreSQL это серверный курсор, — а ингредиенты
+и теги добираются одним запросом на пачку рецептов, поэтому память
+не растет с размером базы. since ограничивает выгрузку объектами,
+созданными после этого момента.
+"""
+import json
+import zlib
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from foodgram.utils import chunks
+from recipes.models import Cart, Favourite, Recipe
+from users.models import Follow
+
+CHUNK_SIZE = 2000
+TABLES = ('recipes', 'favourites', 'carts', 'follows')
+RECIPE_FIELDS = (
+    'id', 'author_id', 'name', 'text', 'cooking_time', 'image', 'pub_date',
+    'favourites_count'
+)
+# Размер буфера, после которого сжатые данные отдаются потребителю.
+FLUSH_SIZE = 64 * 1024
+
+
+def parse_since(value):
+    """Дата (YYYY-MM-DD) или дата и время в ISO 8601."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Неверная дата: {value}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def get_recipe_relations(recipe_ids, using):
+    ingredients = {pk: [] for pk in recipe_ids}
+    tags = {pk: [] for pk in recipe_ids}
+    for recipe_id, *ingredient in Recipe.ingredients.through.objects.using(
+            using
+    ).filter(recipe_id__in=recipe_ids).order_by('pk').values_list(
+        'recipe_id', 'ingredientamount__ingredient_id',
+        'ingredientamount__ingredient__name',
+        'ingredientamount__ingredient__measurement_unit',
+        'ingredientamount__amount'
+    ):
+        ingredients[recipe_id].append(dict(zip(
+            ('id', 'name', 'measurement_unit', 'amount'), ingredient
+        )))
+    for recipe_id, slug in Recipe.tags.through.objects.using(using).filter(
+            recipe_id__in=recipe_ids
+    ).order_by('pk').values_list('recipe_id', 'tag__slug'):
+        tags[recipe_id].append(slug)
+    return ingredients, tags
+
+
+def export_recipes(since, using, chunk_size):
+    recipes = Recipe.objects.using(using).order_by('pk')
+    if since is not None:
+        recipes = recipes.filter(pub_date__gte=since)
+    rows = recipes.values(*RECIPE_FIELDS).iterator(chunk_size=chunk_size)
+    for chunk in chunks(rows, chunk_size):
+        ingredients, tags = get_recipe_relations(
+            [row['id'] for row in chunk], using
+        )
+        for row in chunk:
+            yield dict(
+                row, type='recipe', tags=tags[row['id']],
+                ingredients=ingredients[row['id']]
+            )
+
+
+def export_relations(model, record_type, fields, since, using, chunk_size):
+    objects = model.objects.using(using).order_by('pk')
+    if since is not None:
+        objects = objects.filter(created__gte=since)
+    for row in objects.values(*fields).iterator(chunk_size=chunk_size):
+        yield dict(row, type=record_type)
+
+
+def iter_records(tables=TABLES, since=None, using=DEFAULT_DB_ALIAS,
+                 chunk_size=CHUNK_SIZE):
+    exporters = {
+        'recipes': lambda: export_recipes(since, using, chunk_size),
+        'favourites': lambda: export_relations(
+            Favourite, 'favourite', ('user_id', 'recipe_id', 'created'),
+            since, using, chunk_size
+        ),
+        'carts': lambda: export_relations(
+            Cart, 'cart', ('user_id', 'recipe_id', 'created'),
+            since, using, chunk_size
+        ),
+        'follows': lambda: export_relations(
+            Follow, 'follow', ('user_id', 'author_id', 'created'),
+            since, using, chunk_size
+        ),
+    }
+    for table in tables:
+        yield from exporters[table]()
+
+
+def iter_ndjson_gzip(records):
+    """Сжимает записи в gzip по мере чтения и отдает кусками байтов."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = []
+    size = 0
+    for record in records:
+        data = compressor.compress(
+            (json.dumps(
+                record, cls=DjangoJSONEncoder, ensure_ascii=False
+            ) + '\n').encode()
+        )
+        if data:
+            buffer.append(data)
+            size += len(data)
+        if size >= FLUSH_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    buffer.append(compressor.flush())
+    yield b''.join(buffer)
@@ -0,0 +1,353 @@
+"""
+Массовый импорт рецептов партнеров из NDJSON: одна строка — один рецепт
+в формате POST /api/recipes/, только image — ссылка http(s) или путь
+к файлу внутри IMPORT_DIR, а не base64. Строки обрабатываются пачками
+по IMPORT_CHUNK_SIZE, каждая пачка — одна транзакция: теги и ингредиенты
+проверяются одним запросом на пачку, рецепты и связи вставляются
+bulk_create. Картинки скачивает фоновая задача fetch_recipe_image,
+до этого у рецепта нет изображения. Для каждой строки возвращается
+результат: created с id рецепта или error с ошибками.
+"""
+import http.client
+import ipaddress
+import json
+import os
+import socket
+from io import BytesIO
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+from urllib.request import (HTTPHandler, HTTPRedirectHandler, HTTPSHandler,
+                            ProxyHandler, build_opener)
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image
+
+from foodgram import cache_versions
+from foodgram.utils import chunks
+from recipes import search, tasks
+from recipes.ingredient_index import rebuild_ingredient_index
+from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+
+URL_SCHEMES = ('http', 'https')
+IMAGE_TIMEOUT = 10
+# Ответы, при которых повтор может помочь.
+RETRY_STATUSES = (408, 429)
+
+
+class ImageSourceError(Exception):
+    """Картинку не получить, и повтор не поможет."""
+
+
+def is_url(source):
+    return urlparse(source).scheme in URL_SCHEMES
+
+
+def resolve_image_file(source):
+    """Путь к файлу внутри IMPORT_DIR или None."""
+    root = os.path.realpath(settings.IMPORT_DIR)
+    path = os.path.realpath(os.path.join(root, source))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+
+def check_public_host(hostname, port=None):
+    """
+    Не даем импорту обращаться к внутренним адресам. Возвращает первый
+    адрес хоста, если все его адреса публичные.
+    """
+    try:
+        addresses = socket.getaddrinfo(
+            hostname, port, type=socket.SOCK_STREAM
+        )
+    except (socket.gaierror, UnicodeError):
+        raise ImageSourceError(f'Не удалось найти хост {hostname}')
+    for *_, sockaddr in addresses:
+        if not ipaddress.ip_address(sockaddr[0]).is_global:
+            raise ImageSourceError(f'Хост {hostname} недоступен для импорта')
+    return addresses[0][4][0]
+
+
+def connect_public(hostname, port, timeout):
+    """
+    Подключается к тому адресу, который проверил check_public_host.
+    Второго DNS-запроса нет, поэтому подменить адрес между проверкой
+    и подключением (DNS rebinding) нельзя.
+    """
+    return socket.create_connection(
+        (check_public_host(hostname, port), port), timeout
+    )
+
+
+class PublicHTTPConnection(http.client.HTTPConnection):
+
+    def connect(self):
+        self.sock = connect_public(self.host, self.port, self.timeout)
+
+
+class PublicHTTPSConnection(http.client.HTTPSConnection):
+
+    def connect(self):
+        self.sock = self._context.wrap_socket(
+            connect_public(self.host, self.port, self.timeout),
+            server_hostname=self.host
+        )
+
+
+class PublicHTTPHandler(HTTPHandler):
+
+    def http_open(self, req):
+        return self.do_open(PublicHTTPConnection, req)
+
+
+class PublicHTTPSHandler(HTTPSHandler):
+
+    def https_open(self, req):
+        return self.do_open(PublicHTTPSConnection, req, context=self._context)
+
+
+class PublicRedirectHandler(HTTPRedirectHandler):
+    """Проверяет каждое перенаправление, а не только первый адрес."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not is_url(newurl):
+            raise ImageSourceError(f'Перенаправление на {newurl} запрещено')
+        check_public_host(urlparse(newurl).hostname or '')
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def read_image(source):
+    if not is_url(source):
+        path = resolve_image_file(source)
+        if path is None:
+            raise ImageSourceError(f'Файл {source} не найден')
+        with open(path, 'rb') as image_file:
+            return image_file.read(settings.UPLOAD_FILE_MAX_SIZE + 1)
+    # Без прокси из окружения: подключаться нужно к проверенному адресу.
+    opener = build_opener(
+        ProxyHandler({}), PublicHTTPHandler, PublicHTTPSHandler,
+        PublicRedirectHandler
+    )
+    try:
+        with opener.open(source, timeout=IMAGE_TIMEOUT) as response:
+            return response.read(settings.UPLOAD_FILE_MAX_SIZE + 1)
+    except HTTPError as error:
+        if error.code < 500 and error.code not in RETRY_STATUSES:
+            raise ImageSourceError(f'{source} отвечает {error.code}')
+        raise
+
+
+def fetch_recipe_image(recipe_id, source):
+    """Загружает картинку рецепта из ссылки или файла импорта."""
+    data = read_image(source)
+    if len(data) > settings.UPLOAD_FILE_MAX_SIZE:
+        raise ImageSourceError(
+            f'Картинка {source} больше {settings.UPLOAD_FILE_MAX_SIZE} байт'
+        )
+    try:
+        image = Image.open(BytesIO(data))
+        image.verify()
+    except Exception:
+        raise ImageSourceError(f'{source} — не картинка')
+    recipe = Recipe.objects.filter(pk=recipe_id).only('id', 'image').first()
+    if recipe is None:
+        return
+    recipe.image.save(
+        f'import_{recipe_id}.{image.format.lower()}', ContentFile(data),
+        save=False
+    )
+    Recipe.objects.filter(pk=recipe_id).update(image=recipe.image.name)
+    cache_versions.bump('recipes')
+
+
+def is_integer(value):
+    """bool в JSON — true/false, а не 1/0."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_text(row, errors):
+    for field, max_length in (('name', 200), ('text', None)):
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors[field] = 'Обязательное поле.'
+        elif max_length and len(value) > max_length:
+            errors[field] = f'Не больше {max_length} символов.'
+    cooking_time = row.get('cooking_time')
+    if not is_integer(cooking_time) or cooking_time < 1:
+        errors['cooking_time'] = 'Целое число не меньше 1.'
+    image = row.get('image')
+    if not isinstance(image, str) or not (
+            is_url(image) or resolve_image_file(image)
+    ):
+        errors['image'] = 'Ссылка http(s) или файл внутри IMPORT_DIR.'
+
+
+def validate_relations(row, errors):
+    tags = row.get('tags')
+    if (not isinstance(tags, list) or not tags
+            or not all(is_integer(pk) for pk in tags)):
+        errors['tags'] = 'Список id, хотя бы 1 тег.'
+    elif len(set(tags)) != len(tags):
+        errors['tags'] = 'Один и тот же тег встречается дважды!'
+    ingredients = row.get('ingredients')
+    try:
+        if any(isinstance(item['amount'], bool) for item in ingredients):
+            raise ValueError
+        pairs = [
+            (item['id'], float(item['amount'])) for item in ingredients
+        ]
+    except (TypeError, KeyError, ValueError):
+        errors['ingredients'] = 'Список объектов {"id": ..., "amount": ...}.'
+        return
+    ids = [pk for pk, _ in pairs]
+    if not pairs or not all(is_integer(pk) for pk in ids):
+        errors['ingredients'] = 'Хотя бы 1 ингредиент с целым id.'
+    elif any(amount < 0 for _, amount in pairs):
+        errors['ingredients'] = 'Количество не может быть отрицательным.'
+    elif len(set(ids)) != len(ids):
+        errors['ingredients'] = (
+            'Один и тот же ингредиент встречается дважды!'
+        )
+    else:
+        row['ingredients'] = pairs
+
+
+def parse_row(line):
+    """Возвращает (рецепт, ошибки) для одной строки NDJSON."""
+    try:
+        row = json.loads(line)
+    except ValueError as error:
+        return None, {'line': f'Неверный JSON: {error}'}
+    if not isinstance(row, dict):
+        return None, {'line': 'Строка должна быть JSON-объектом.'}
+    errors = {}
+    validate_text(row, errors)
+    validate_relations(row, errors)
+    return row, errors
+
+
+def check_references(rows):
+    """Проверяет теги и ингредиенты всей пачки двумя запросами."""
+    tag_ids = set(Tag.objects.filter(id__in={
+        pk for row, _ in rows for pk in row['tags']
+    }).values_list('id', flat=True))
+    ingredient_ids = set(Ingredient.objects.filter(id__in={
+        pk for row, _ in rows for pk, _ in row['ingredients']
+    }).values_list('id', flat=True))
+    for row, errors in rows:
+        missing = sorted(set(row['tags']) - tag_ids)
+        if missing:
+            errors['tags'] = f'Нет тегов с id {missing}.'
+        missing = sorted(
+            {pk for pk, _ in row['ingredients']} - ingredient_ids
+        )
+        if missing:
+            errors['ingredients'] = f'Нет ингредиентов с id {missing}.'
+
+
+def get_amount_ids(pairs):
+    """
+    id IngredientAmount для пар (ингредиент, количество),
+    недостающие создаются одним bulk_create.
+    """
+    def load():
+        return {
+            (ingredient_id, amount): pk
+            for pk, ingredient_id, amount in IngredientAmount.objects.filter(
+                ingredient_id__in={pk for pk, _ in pairs},
+                amount__in={amount for _, amount in pairs}
+            ).order_by('-pk').values_list('pk', 'ingredient_id', 'amount')
+        }
+    amount_ids = load()
+    missing = pairs - set(amount_ids)
+    if missing:
+        IngredientAmount.objects.bulk_create([
+            IngredientAmount(ingredient_id=pk, amount=amount)
+            for pk, amount in missing
+        ])
+        amount_ids = load()
+    return amount_ids
+
+
+def create_recipes(recipes):
+    if connection.features.can_return_ids_from_bulk_insert:
+        Recipe.objects.bulk_create(recipes)
+        return
+    # SQLite не возвращает id из bulk_create, а угадывать их по порядку
+    # строк нельзя: между ними может вставить рецепт другой запрос.
+    # Вставляем по одному и берем id последней вставки этого соединения.
+    for recipe in recipes:
+        Recipe.objects.bulk_create([recipe])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT last_insert_rowid()')
+            recipe.pk = cursor.fetchone()[0]
+
+
+def save_chunk(rows, author):
+    recipes = [
+        Recipe(
+            author=author, name=row['name'], text=row['text'],
+            cooking_time=row['cooking_time'], image=''
+        )
+        for row in rows
+    ]
+    create_recipes(recipes)
+    amount_ids = get_amount_ids({
+        pair for row in rows for pair in row['ingredients']
+    })
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.pk, tag_id=pk)
+        for recipe, row in zip(recipes, rows) for pk in row['tags']
+    ])
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(
+            recipe_id=recipe.pk, ingredientamount_id=amount_ids[pair]
+        )
+        for recipe, row in zip(recipes, rows) for pair in row['ingredients']
+    ])
+    ids = [recipe.pk for recipe in recipes]
+    # bulk_create не отправляет сигналы, поэтому индексы обновляем здесь.
+    rebuild_ingredient_index(ids)
+    for recipe in recipes:
+        search.index_recipe(recipe, connection.alias)
+    tasks.update_similar_recipes.enqueue(ids)
+    tasks.fan_out_recipes.enqueue(ids)
+    for recipe, row in zip(recipes, rows):
+        tasks.fetch_recipe_image.enqueue(recipe.pk, row['image'])
+    cache_versions.bump('recipes')
+    return ids
+
+
+def import_chunk(lines, author):
+    parsed = [parse_row(line) for _, line in lines]
+    valid = [(row, errors) for row, errors in parsed if not errors]
+    if valid:
+        check_references(valid)
+    rows = [row for row, errors in parsed if row is not None and not errors]
+    ids = iter(save_chunk(rows, author) if rows else ())
+    report = []
+    for (number, _), (row, errors) in zip(lines, parsed):
+        result = {'line': number}
+        if row is not None and 'external_id' in row:
+            result['external_id'] = row['external_id']
+        if errors:
+            result.update(result='error', errors=errors)
+        else:
+            result.update(result='created', id=next(ids))
+        report.append(result)
+    return report
+
+
+def import_recipes(lines, author, chunk_size=None):
+    """Импортирует строки NDJSON и по пачкам отдает отчет по строкам."""
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    lines = (
+        (number, line) for number, line in enumerate(lines, 1)
+        if line.strip()
+    )
+    for chunk in chunks(lines, chunk_size):
+        with transaction.atomic():
+            report = import_chunk(chunk, author)
+        yield from report
@@ -0,0 +1,60 @@
+"""
+Индекс рецепт → ингредиент (RecipeIngredientIndex) для фильтров
+по ингредиентам без двойного join через IngredientAmount.
+Обновляется сигналами из recipes/signals.py при изменении
+Recipe.ingredients и IngredientAmount.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from recipes.models import Recipe, RecipeIngredientIndex
+
+
+def rebuild_ingredient_index(recipe_ids=None):
+    """Пересобирает индекс для указанных рецептов или для всех."""
+    index = RecipeIngredientIndex.objects.all()
+    links = Recipe.ingredients.through.objects.all()
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        index = index.filter(recipe_id__in=recipe_ids)
+        links = links.filter(recipe_id__in=recipe_ids)
+    rows = links.values_list(
+        'recipe_id', 'ingredientamount__ingredient_id'
+    ).distinct()
+    with transaction.atomic():
+        index.delete()
+        RecipeIngredientIndex.objects.bulk_create(
+            [
+                RecipeIngredientIndex(
+                    recipe_id=recipe_id, ingredient_id=ingredient_id
+                )
+                for recipe_id, ingredient_id in rows.iterator()
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+def filter_by_ingredients(queryset, include=(), exclude=(), available=()):
+    """
+    include — в рецепте есть все перечисленные ингредиенты,
+    exclude — нет ни одного из перечисленных,
+    available — все ингредиенты рецепта есть среди перечисленных.
+    """
+    index = RecipeIngredientIndex.objects
+    if include:
+        include = set(include)
+        queryset = queryset.filter(id__in=index.filter(
+            ingredient_id__in=include
+        ).values('recipe_id').annotate(
+            matched=Count('ingredient_id')
+        ).filter(matched=len(include)).values('recipe_id'))
+    if exclude:
+        queryset = queryset.exclude(id__in=index.filter(
+            ingredient_id__in=set(exclude)
+        ).values('recipe_id'))
+    if available:
+        queryset = queryset.exclude(id__in=index.exclude(
+            ingredient_id__in=set(available)
+        ).values('recipe_id'))
+    return queryset
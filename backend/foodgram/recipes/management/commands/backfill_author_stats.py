@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from recipes.author_stats import backfill_author_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает дневную статистику авторов по истории'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--author', type=int, dest='author_id',
+            help='Пересобрать статистику только этого автора'
+        )
+
+    def handle(self, *args, author_id=None, **options):
+        authors = backfill_author_stats(
+            None if author_id is None else [author_id]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрана статистика авторов: {authors}'
+        ))
@@ -0,0 +1,31 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from recipes.feed import backfill_timeline
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Заполняет ленты подписок по текущим подпискам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, dest='user_id',
+            help='Заполнить ленту только этого пользователя'
+        )
+
+    def handle(self, *args, user_id=None, **options):
+        follows = Follow.objects.all()
+        if user_id is not None:
+            follows = follows.filter(user_id=user_id)
+        authors = defaultdict(list)
+        for follower_id, author_id in follows.values_list(
+                'user_id', 'author_id'
+        ).iterator():
+            authors[follower_id].append(author_id)
+        for follower_id, author_ids in authors.items():
+            backfill_timeline(follower_id, author_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Заполнено лент: {len(authors)}'
+        ))
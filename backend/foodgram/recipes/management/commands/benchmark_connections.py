@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+MODES = (
+    ('close', 0),
+    ('persistent', None),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку запросов к API с закрытием соединения '
+        'после каждого запроса (CONN_MAX_AGE=0, для пула — возврат в пул) '
+        'и с постоянным соединением'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--path', default='/api/tags/')
+
+    def run(self, client, path, count):
+        connects = []
+
+        def count_connect(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        connection_created.connect(count_connect)
+        timings = []
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                client.get(path)
+                # Тестовый клиент отключает это от сигналов запроса.
+                close_old_connections()
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection_created.disconnect(count_connect)
+        return timings, len(connects)
+
+    def handle(self, *args, **options):
+        client = Client()
+        settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+        conn_max_age = settings_dict['CONN_MAX_AGE']
+        self.stdout.write(
+            f'{"mode":<12}{"mean":>9}{"p50":>9}{"p95":>9}{"connects":>10}'
+        )
+        try:
+            for mode, max_age in MODES:
+                settings_dict['CONN_MAX_AGE'] = max_age
+                connections.close_all()
+                client.get(options['path'])
+                timings, connects = self.run(
+                    client, options['path'], options['requests']
+                )
+                p95 = sorted(timings)[int(len(timings) * 0.95)]
+                self.stdout.write(
+                    f'{mode:<12}{statistics.mean(timings):>9.2f}'
+                    f'{statistics.median(timings):>9.2f}'
+                    f'{p95:>9.2f}{connects:>10}'
+                )
+        finally:
+            settings_dict['CONN_MAX_AGE'] = conn_max_age
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.export import (CHUNK_SIZE, TABLES, iter_ndjson_gzip,
+                            iter_records, parse_since)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает рецепты, избранное, покупки и подписки в NDJSON.gz'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help='Файл для выгрузки, по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--since',
+            help='Только объекты, созданные начиная с этой даты (ISO 8601)'
+        )
+        parser.add_argument(
+            '--tables', default=','.join(TABLES),
+            help=f'Таблицы через запятую: {", ".join(TABLES)}'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, output, since, tables, chunk_size, **options):
+        tables = tables.split(',')
+        unknown = set(tables) - set(TABLES)
+        if unknown:
+            raise CommandError(f'Неизвестные таблицы: {", ".join(unknown)}')
+        try:
+            since = parse_since(since) if since else None
+        except ValueError as error:
+            raise CommandError(error)
+        records = iter_records(tables, since, chunk_size=chunk_size)
+        if output == '-':
+            self.write(sys.stdout.buffer, records)
+            return
+        with open(output, 'wb') as export_file:
+            self.write(export_file, records)
+        self.stdout.write(self.style.SUCCESS(f'Выгрузка сохранена в {output}'))
+
+    @staticmethod
+    def write(export_file, records):
+        for data in iter_ndjson_gzip(records):
+            export_file.write(data)
@@ -0,0 +1,54 @@
+import gzip
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.importer import import_recipes
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Импортирует рецепты из NDJSON (или NDJSON.gz) от имени автора'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с рецептами, - — stdin')
+        parser.add_argument(
+            '--author', required=True, help='email автора рецептов'
+        )
+        parser.add_argument(
+            '--report', help='Сохранить отчет по строкам в NDJSON-файл'
+        )
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, path, author, report, chunk_size, **options):
+        author = User.objects.filter(email=author).first()
+        if author is None:
+            raise CommandError('Автор не найден')
+        if path == '-':
+            lines = sys.stdin.buffer
+        elif path.endswith('.gz'):
+            lines = gzip.open(path, 'rb')
+        else:
+            lines = open(path, 'rb')
+        report_file = open(report, 'w') if report else None
+        created = failed = 0
+        try:
+            for row in import_recipes(lines, author, chunk_size):
+                if row['result'] == 'created':
+                    created += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f'Строка {row["line"]}: {row["errors"]}')
+                if report_file is not None:
+                    report_file.write(
+                        json.dumps(row, ensure_ascii=False) + '\n'
+                    )
+        finally:
+            if path != '-':
+                lines.close()
+            if report_file is not None:
+                report_file.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано рецептов: {created}, с ошибками: {failed}'
+        ))
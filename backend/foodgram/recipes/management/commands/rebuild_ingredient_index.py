@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes.ingredient_index import rebuild_ingredient_index
+from recipes.models import RecipeIngredientIndex
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересобирает индекс рецепт → ингредиент'
+
+    def handle(self, *args, **options):
+        rebuild_ingredient_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в индексе: {RecipeIngredientIndex.objects.count()}'
+        ))
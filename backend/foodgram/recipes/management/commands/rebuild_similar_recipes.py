@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import SimilarRecipe
+from recipes.similarity import rebuild_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересчитывает списки похожих рецептов'
+
+    def handle(self, *args, **options):
+        rebuild_similar_recipes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей о похожих рецептах: {SimilarRecipe.objects.count()}'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import PopularRecipe
+from recipes.popularity import refresh_popular_recipes
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает популярные рецепты за сутки, неделю и все время'
+
+    def handle(self, *args, **options):
+        refresh_popular_recipes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей о популярных рецептах: {PopularRecipe.objects.count()}'
+        ))
@@ -0,0 +1,71 @@
+import signal
+import threading
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from foodgram import tasks
+
+SCHEDULE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Выполнять задачи в пуле процессов, а не потоков'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти'
+        )
+
+    def handle(self, *args, concurrency, processes, poll, once, **options):
+        tasks.load_tasks()
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+        if processes:
+            # Открытое соединение нельзя делить с дочерними процессами.
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                concurrency, initializer=tasks.init_process
+            )
+        else:
+            executor = ThreadPoolExecutor(concurrency)
+        with executor:
+            self.loop(executor, concurrency, poll, once, stop)
+        self.stdout.write(self.style.SUCCESS('Воркер остановлен'))
+
+    @staticmethod
+    def loop(executor, concurrency, poll, once, stop):
+        running = set()
+        scheduled_at = None
+        while not stop.is_set():
+            now = time.monotonic()
+            if scheduled_at is None or now - scheduled_at >= SCHEDULE_INTERVAL:
+                tasks.schedule_periodic()
+                scheduled_at = now
+            claimed = tasks.claim(concurrency - len(running))
+            running.update(
+                executor.submit(tasks.execute, pk, lease)
+                for pk, lease in claimed
+            )
+            if once and not running:
+                return
+            if running:
+                _, running = wait(
+                    running, timeout=poll, return_when=FIRST_COMPLETED
+                )
+            else:
+                stop.wait(poll)
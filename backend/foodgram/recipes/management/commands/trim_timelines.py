@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.feed import trim_timelines
+
+
+class Command(BaseCommand):
+    help = 'Обрезает ленты подписок до FEED_TIMELINE_LENGTH записей'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено записей: {trim_timelines()}'
+        ))
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_ingredient_index(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredientIndex = apps.get_model('recipes', 'RecipeIngredientIndex')
+    rows = Recipe.ingredients.through.objects.values_list(
+        'recipe_id', 'ingredientamount__ingredient_id'
+    ).distinct()
+    RecipeIngredientIndex.objects.bulk_create(
+        [
+            RecipeIngredientIndex(recipe_id=recipe_id, ingredient_id=ingredient_id)
+            for recipe_id, ingredient_id in rows.iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeIngredientIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.Ingredient')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_index', to='recipes.Recipe')),
+            ],
+            options={
+                'verbose_name': 'Индекс ингредиентов рецепта',
+                'verbose_name_plural': 'Индекс ингредиентов рецептов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredientindex',
+            constraint=models.UniqueConstraint(fields=('ingredient', 'recipe'), name='unique_ingredient_recipe_index'),
+        ),
+        migrations.RunPython(fill_ingredient_index, migrations.RunPython.noop),
+    ]
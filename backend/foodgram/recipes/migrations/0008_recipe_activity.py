@@ -0,0 +1,90 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from collections import defaultdict
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def fill_recipe_activity(apps, schema_editor):
+    RecipeActivity = apps.get_model('recipes', 'RecipeActivity')
+    buckets = defaultdict(lambda: {'favourites': 0, 'carts': 0})
+    for field, model_name in (('favourites', 'Favourite'), ('carts', 'Cart')):
+        rows = apps.get_model('recipes', model_name).objects.annotate(
+            hour=TruncHour('created')
+        ).values('recipe_id', 'hour').annotate(total=Count('id')).order_by()
+        for row in rows:
+            buckets[row['recipe_id'], row['hour']][field] = row['total']
+    RecipeActivity.objects.bulk_create(
+        [
+            RecipeActivity(recipe_id=recipe_id, hour=hour, **counts)
+            for (recipe_id, hour), counts in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_timeline_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='favourite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='RecipeActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('favourites', models.IntegerField(default=0)),
+                ('carts', models.IntegerField(default=0)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.Recipe')),
+            ],
+            options={
+                'verbose_name': 'Активность по рецепту',
+                'verbose_name_plural': 'Активность по рецептам',
+            },
+        ),
+        migrations.CreateModel(
+            name='PopularRecipe',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('day', 'Сутки'), ('week', 'Неделя'), ('all', 'Все время')], max_length=4)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.IntegerField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.Recipe')),
+            ],
+            options={
+                'verbose_name': 'Популярный рецепт',
+                'verbose_name_plural': 'Популярные рецепты',
+                'ordering': ['window', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipeactivity',
+            index=models.Index(fields=['hour'], name='recipe_activity_hour_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeactivity',
+            constraint=models.UniqueConstraint(fields=('recipe', 'hour'), name='unique_recipe_activity_hour'),
+        ),
+        migrations.AddConstraint(
+            model_name='popularrecipe',
+            constraint=models.UniqueConstraint(fields=('window', 'rank'), name='unique_popular_window_rank'),
+        ),
+        migrations.RunPython(fill_recipe_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:40
+
+from django.db import migrations, models
+
+
+NAMESPACES = (
+    'recipes', 'tags', 'ingredients', 'users', 'follows', 'favourites',
+    'carts', 'popular',
+)
+
+
+def create_namespaces(apps, schema_editor):
+    CacheVersion = apps.get_model('recipes', 'CacheVersion')
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(namespace=namespace) for namespace in NAMESPACES],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('namespace', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Версия кэша',
+                'verbose_name_plural': 'Версии кэша',
+            },
+        ),
+        migrations.RunPython(create_namespaces, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0010_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRecipeStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('favourites', models.IntegerField(default=0)),
+                ('carts', models.IntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.Recipe')),
+            ],
+            options={
+                'verbose_name': 'Дневная статистика рецепта',
+                'verbose_name_plural': 'Дневная статистика рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyFollowerStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('followers', models.IntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Дневная статистика подписчиков',
+                'verbose_name_plural': 'Дневная статистика подписчиков',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='dailyrecipestats',
+            index=models.Index(fields=['author', 'day'], name='daily_recipe_author_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrecipestats',
+            constraint=models.UniqueConstraint(fields=('recipe', 'day'), name='unique_daily_recipe_stats'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyfollowerstats',
+            constraint=models.UniqueConstraint(fields=('author', 'day'), name='unique_daily_follower_stats'),
+        ),
+    ]
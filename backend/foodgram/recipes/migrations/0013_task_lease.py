@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_import_permission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='lease',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
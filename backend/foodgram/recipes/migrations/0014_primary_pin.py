@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_follow_created'),
+        ('recipes', '0013_task_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrimaryPin',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('until', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Чтение из основной базы',
+                'verbose_name_plural': 'Чтение из основной базы',
+            },
+        ),
+    ]
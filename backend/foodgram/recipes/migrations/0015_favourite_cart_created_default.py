@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_primary_pin'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cart',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Добавлено'),
+        ),
+        migrations.AlterField(
+            model_name='favourite',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Добавлено'),
+        ),
+    ]
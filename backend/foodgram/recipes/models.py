@@ -1,5 +1,7 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from users.models import User
 
@@ -73,11 +75,38 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    search_vector = SearchVectorField(
+        null=True, editable=False,
+        help_text='Заполняется триггером БД, см. recipes/search.py'
+    )
+    favourites_count = models.PositiveIntegerField(
+        verbose_name='В избранном', default=0, editable=False
+    )
 
     class Meta:
         verbose_name_plural = 'Рецепты'
         verbose_name = 'Рецепт'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        permissions = [
+            ('import_recipes', 'Может импортировать рецепты пачками'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_pub_date_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', '-pub_date', '-id'],
+                name='recipe_cooking_time_idx'
+            ),
+            models.Index(
+                fields=['-favourites_count', '-pub_date', '-id'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -96,6 +125,10 @@ class Favourite(models.Model):
         verbose_name='Рецепт',
         related_name='favourites',
     )
+    # default, как у Follow.created: loaddata пишет в raw-режиме.
+    created = models.DateTimeField(
+        verbose_name='Добавлено', default=timezone.now
+    )
 
     class Meta:
         ordering = ['user']
@@ -125,6 +158,10 @@ class Cart(models.Model):
         verbose_name='Рецепт',
         related_name='carts',
     )
+    # default, как у Follow.created: loaddata пишет в raw-режиме.
+    created = models.DateTimeField(
+        verbose_name='Добавлено', default=timezone.now
+    )
 
     class Meta:
         constraints = [
@@ -138,3 +175,315 @@ class Cart(models.Model):
 
     def __str__(self):
         return f'{self.user.username} gonna buy: {self.recipe.name}'
+
+
+class RecipeIngredientIndex(models.Model):
+    """
+    Плоская связь рецепт → ингредиент без промежуточного IngredientAmount.
+    Поддерживается сигналами, см. recipes/ingredient_index.py.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='ingredient_index',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ingredient', 'recipe'],
+                name='unique_ingredient_recipe_index'),
+        ]
+        verbose_name_plural = 'Индекс ингредиентов рецептов'
+        verbose_name = 'Индекс ингредиентов рецепта'
+
+    def __str__(self):
+        return f'{self.recipe_id} → {self.ingredient_id}'
+
+
+class SimilarRecipe(models.Model):
+    """
+    Заранее посчитанные top-K похожих рецептов,
+    см. recipes/similarity.py.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_links',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['recipe', 'rank']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'rank'],
+                name='unique_recipe_similar_rank'),
+        ]
+        verbose_name_plural = 'Похожие рецепты'
+        verbose_name = 'Похожий рецепт'
+
+    def __str__(self):
+        return f'{self.recipe_id} ~ {self.similar_id}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Рецепт в ленте подписчика, раскладывается при публикации,
+    см. recipes/feed.py.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_user_timeline_recipe'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='timeline_user_pub_date_idx'
+            ),
+        ]
+        verbose_name_plural = 'Ленты подписок'
+        verbose_name = 'Запись ленты подписок'
+
+    def __str__(self):
+        return f'{self.user_id} ← {self.recipe_id}'
+
+
+class RecipeActivity(models.Model):
+    """
+    Почасовая сводка: сколько раз рецепт добавили в избранное
+    и в покупки, см. recipes/popularity.py.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    hour = models.DateTimeField()
+    favourites = models.IntegerField(default=0)
+    carts = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'hour'],
+                name='unique_recipe_activity_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='recipe_activity_hour_idx'),
+        ]
+        verbose_name_plural = 'Активность по рецептам'
+        verbose_name = 'Активность по рецепту'
+
+    def __str__(self):
+        return f'{self.recipe_id} @ {self.hour:%Y-%m-%d %H:00}'
+
+
+class PopularRecipe(models.Model):
+    """Готовый top-N популярных рецептов за окно времени."""
+    DAY = 'day'
+    WEEK = 'week'
+    ALL = 'all'
+    WINDOWS = (
+        (DAY, 'Сутки'),
+        (WEEK, 'Неделя'),
+        (ALL, 'Все время'),
+    )
+
+    window = models.CharField(max_length=4, choices=WINDOWS)
+    rank = models.PositiveSmallIntegerField()
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.IntegerField()
+
+    class Meta:
+        ordering = ['window', 'rank']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['window', 'rank'],
+                name='unique_popular_window_rank'),
+        ]
+        verbose_name_plural = 'Популярные рецепты'
+        verbose_name = 'Популярный рецепт'
+
+    def __str__(self):
+        return f'{self.window} #{self.rank}: {self.recipe_id}'
+
+
+class CacheVersion(models.Model):
+    """Версия пространства кэша, см. foodgram/cache_versions.py."""
+    namespace = models.CharField(max_length=32, primary_key=True)
+    version = models.BigIntegerField(default=1)
+
+    class Meta:
+        verbose_name_plural = 'Версии кэша'
+        verbose_name = 'Версия кэша'
+
+    def __str__(self):
+        return f'{self.namespace}: {self.version}'
+
+
+class PrimaryPin(models.Model):
+    """
+    До until запросы пользователя читают только из основной базы,
+    см. foodgram/replicas.py.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    until = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'Чтение из основной базы'
+        verbose_name = 'Чтение из основной базы'
+
+    def __str__(self):
+        return f'{self.user_id} до {self.until}'
+
+
+class Task(models.Model):
+    """Фоновая задача в очереди, см. foodgram/tasks.py."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    payload = models.TextField(default='{}', verbose_name='Аргументы')
+    status = models.CharField(
+        max_length=8, choices=STATUSES, default=PENDING,
+        verbose_name='Статус'
+    )
+    dedup_key = models.CharField(
+        max_length=200, null=True, blank=True,
+        verbose_name='Ключ дедупликации'
+    )
+    run_at = models.DateTimeField(verbose_name='Запустить после')
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3, verbose_name='Максимум попыток'
+    )
+    locked_until = models.DateTimeField(null=True, blank=True)
+    # Метка аренды: новая при каждом захвате, по ней воркер проверяет,
+    # что задача все еще его.
+    lease = models.CharField(max_length=32, null=True, blank=True)
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_task_dedup_key'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'], name='task_status_run_at_idx'
+            ),
+        ]
+        verbose_name_plural = 'Фоновые задачи'
+        verbose_name = 'Фоновая задача'
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
+
+
+class DailyRecipeStats(models.Model):
+    """
+    Дневная сводка по рецепту для статистики автора: сколько
+    добавлений в избранное и в покупки того дня еще на месте,
+    см. recipes/author_stats.py.
+    """
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    day = models.DateField()
+    favourites = models.IntegerField(default=0)
+    carts = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'day'],
+                name='unique_daily_recipe_stats'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['author', 'day'], name='daily_recipe_author_day_idx'
+            ),
+        ]
+        verbose_name_plural = 'Дневная статистика рецептов'
+        verbose_name = 'Дневная статистика рецепта'
+
+    def __str__(self):
+        return f'{self.recipe_id} @ {self.day}'
+
+
+class DailyFollowerStats(models.Model):
+    """Сколько подписок на автора, оформленных в этот день, еще на месте."""
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    day = models.DateField()
+    followers = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'day'],
+                name='unique_daily_follower_stats'),
+        ]
+        verbose_name_plural = 'Дневная статистика подписчиков'
+        verbose_name = 'Дневная статистика подписчиков'
+
+    def __str__(self):
+        return f'{self.author_id} @ {self.day}'
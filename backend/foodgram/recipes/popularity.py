@@ -0,0 +1,98 @@
+"""
+Популярные рецепты. Добавление в избранное или в покупки увеличивает
+почасовую сводку RecipeActivity, удаление уменьшает сводку того часа,
+когда запись была создана. Команда refresh_popular_recipes (по расписанию,
+раз в час) пересчитывает top-N каждого окна в PopularRecipe и поднимает
+версию кэша popular, а эндпоинт читает готовый список через кэш.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from foodgram import cache_versions
+from foodgram.metrics import record_cache_access
+from recipes.counters import increment
+from recipes.models import Cart, Favourite, PopularRecipe, RecipeActivity
+
+TOP_N = 50
+FAVOURITE_WEIGHT = 2
+CART_WEIGHT = 1
+WINDOWS = {
+    PopularRecipe.DAY: timedelta(days=1),
+    PopularRecipe.WEEK: timedelta(weeks=1),
+    PopularRecipe.ALL: None,
+}
+ACTIVITY_FIELDS = {
+    Favourite: 'favourites',
+    Cart: 'carts',
+}
+CACHE_KEY = 'popular:{}'
+CACHE_TIMEOUT = 3600
+
+
+def truncate_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_activity(recipe_ids, moment, field, delta=1):
+    """Прибавляет delta к полю field часовой сводки рецептов."""
+    hour = truncate_hour(moment)
+    for recipe_id in recipe_ids:
+        increment(
+            RecipeActivity, field, delta, recipe_id=recipe_id, hour=hour
+        )
+
+
+def record_activities(rows, field, delta=1):
+    """record_activity для пар (id рецепта, момент) пакетных запросов."""
+    hours = defaultdict(list)
+    for recipe_id, moment in rows:
+        hours[truncate_hour(moment)].append(recipe_id)
+    for hour, recipe_ids in hours.items():
+        record_activity(recipe_ids, hour, field, delta)
+
+
+def refresh_popular_recipes(now=None):
+    now = now or timezone.now()
+    score = Sum('favourites') * FAVOURITE_WEIGHT + Sum('carts') * CART_WEIGHT
+    popular = []
+    for window, duration in WINDOWS.items():
+        activity = RecipeActivity.objects.all()
+        if duration is not None:
+            activity = activity.filter(hour__gte=truncate_hour(now - duration))
+        top = activity.values('recipe_id').annotate(score=score).filter(
+            score__gt=0
+        ).order_by('-score', '-recipe_id')[:TOP_N]
+        popular.extend(
+            PopularRecipe(
+                window=window, rank=rank,
+                recipe_id=row['recipe_id'], score=row['score']
+            )
+            for rank, row in enumerate(top)
+        )
+    with transaction.atomic():
+        PopularRecipe.objects.all().delete()
+        PopularRecipe.objects.bulk_create(popular)
+        cache_versions.bump('popular')
+
+
+def get_popular_recipes(window):
+    """[(id, name, image, cooking_time, score)] из кэша или одним запросом."""
+    key = cache_versions.versioned_key(
+        CACHE_KEY.format(window), 'popular', 'recipes'
+    )
+    rows = cache.get(key)
+    record_cache_access('popular_recipes', rows is not None)
+    if rows is None:
+        rows = list(PopularRecipe.objects.filter(
+            window=window
+        ).order_by('rank').values_list(
+            'recipe_id', 'recipe__name', 'recipe__image',
+            'recipe__cooking_time', 'score'
+        ))
+        cache.set(key, rows, CACHE_TIMEOUT)
+    return rows
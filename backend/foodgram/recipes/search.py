@@ -0,0 +1,86 @@
+"""
+Полнотекстовый поиск по названию и описанию рецептов.
+
+На PostgreSQL поле Recipe.search_vector (конфигурация russian, название
+с весом A, описание с весом B) заполняет триггер из миграции 0003,
+поиск идет по GIN-индексу. На SQLite используется таблица FTS5
+recipes_recipe_fts, которую синхронизируют сигналы из recipes/signals.py.
+На обеих базах каждое слово запроса ищется по префиксу и все слова
+должны встретиться; PostgreSQL вдобавок приводит слова к основе.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipes_recipe_fts'
+
+
+def fts_match_expression(query):
+    """Каждое слово запроса — отдельная фраза с поиском по префиксу."""
+    return ' '.join(
+        '"{}"*'.format(token.replace('"', '""')) for token in query.split()
+    )
+
+
+def tsquery_expression(query):
+    """То же для to_tsquery: слова по префиксу через &."""
+    return ' & '.join(
+        "'{}':*".format(token.replace('\\', '\\\\').replace("'", "''"))
+        for token in query.split()
+    )
+
+
+def search_recipes(queryset, query):
+    """
+    Оставляет в queryset рецепты, подходящие под запрос,
+    и аннотирует их релевантностью search_rank (чем больше, тем лучше).
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        search_query = SearchQuery(
+            tsquery_expression(query), config=SEARCH_CONFIG,
+            search_type='raw'
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), search_query), FloatField()
+            )
+        )
+    if vendor == 'sqlite':
+        # SQLite теряет строки, если таблица FTS5 встречается в запросе
+        # дважды, поэтому и фильтр, и ранг берутся из одного подзапроса.
+        return queryset.annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = recipes_recipe.id',
+            [fts_match_expression(query)],
+            output_field=FloatField()
+        )).filter(search_rank__isnull=False)
+    return queryset.filter(
+        Q(name__icontains=query) | Q(text__icontains=query)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_recipe(recipe, using):
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [recipe.pk]
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+            f'VALUES (%s, %s, %s)',
+            [recipe.pk, recipe.name, recipe.text]
+        )
+
+
+def unindex_recipe(recipe_id, using):
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [recipe_id]
+        )
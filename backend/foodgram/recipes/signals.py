@@ -0,0 +1,181 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from foodgram import cache_versions
+from recipes import author_stats, feed, popularity, search, tasks
+from recipes.counters import refresh_favourites_count
+from recipes.ingredient_index import rebuild_ingredient_index
+from recipes.models import (Cart, Favourite, Ingredient, IngredientAmount,
+                            Recipe, Tag)
+from users.models import Follow, User
+
+CACHE_NAMESPACES = {
+    Recipe: 'recipes',
+    Recipe.tags.through: 'recipes',
+    Recipe.ingredients.through: 'recipes',
+    Tag: 'tags',
+    Ingredient: 'ingredients',
+    User: 'users',
+    Follow: 'follows',
+    Favourite: 'favourites',
+    Cart: 'carts',
+}
+
+
+def update_similar_recipes(recipe_ids):
+    for recipe_id in recipe_ids:
+        tasks.update_similar_recipes.enqueue(
+            [recipe_id], dedup_key=f'similar:{recipe_id}'
+        )
+
+
+def reindex_ingredients(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    rebuild_ingredient_index(recipe_ids)
+    update_similar_recipes(recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_index(sender, instance, using, **kwargs):
+    search.index_recipe(instance, using)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        tasks.fan_out_recipe.enqueue(
+            instance.pk, dedup_key=f'fan_out:{instance.pk}'
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    search.unindex_recipe(instance.pk, using)
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_ingredient_index(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._indexed_recipe_ids = list(
+            instance.recipes.values_list('id', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        reindex_ingredients([instance.pk])
+    elif action == 'post_clear':
+        reindex_ingredients(instance._indexed_recipe_ids)
+    else:
+        reindex_ingredients(pk_set)
+
+
+@receiver(post_save, sender=IngredientAmount)
+def update_ingredient_index_for_amount(sender, instance, created, raw,
+                                       **kwargs):
+    if not created and not raw:
+        reindex_ingredients(instance.recipes.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_similar_recipes_for_tags(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._similar_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_similar_recipes([instance.pk])
+    elif action == 'post_clear':
+        update_similar_recipes(instance._similar_recipe_ids)
+    else:
+        update_similar_recipes(pk_set)
+
+
+@receiver(post_save, sender=Favourite)
+@receiver(post_delete, sender=Favourite)
+def update_favourites_count(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_favourites_count([instance.recipe_id])
+
+
+@receiver(post_save, sender=Favourite)
+@receiver(post_save, sender=Cart)
+def record_activity(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        popularity.record_activity(
+            [instance.recipe_id], instance.created,
+            popularity.ACTIVITY_FIELDS[sender]
+        )
+
+
+@receiver(post_delete, sender=Favourite)
+@receiver(post_delete, sender=Cart)
+def revert_activity(sender, instance, **kwargs):
+    popularity.record_activity(
+        [instance.recipe_id], instance.created,
+        popularity.ACTIVITY_FIELDS[sender], delta=-1
+    )
+
+
+@receiver(post_save, sender=Favourite)
+@receiver(post_save, sender=Cart)
+def record_author_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        author_stats.record_recipe_event(
+            [instance.recipe_id], instance.created,
+            popularity.ACTIVITY_FIELDS[sender]
+        )
+
+
+@receiver(post_delete, sender=Favourite)
+@receiver(post_delete, sender=Cart)
+def revert_author_stats(sender, instance, **kwargs):
+    author_stats.record_recipe_event(
+        [instance.recipe_id], instance.created,
+        popularity.ACTIVITY_FIELDS[sender], delta=-1
+    )
+
+
+@receiver(post_save, sender=Follow)
+def record_follower_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        author_stats.record_follow_event(
+            [instance.author_id], instance.created
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def revert_follower_stats(sender, instance, **kwargs):
+    author_stats.record_follow_event(
+        [instance.author_id], instance.created, delta=-1
+    )
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        feed.backfill_timeline(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def remove_from_timeline(sender, instance, **kwargs):
+    feed.remove_from_timeline(instance.user_id, [instance.author_id])
+
+
+def bump_cache_version(sender, update_fields=None, action=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    if action is not None and not action.startswith('post_'):
+        return
+    cache_versions.bump(CACHE_NAMESPACES[sender])
+
+
+for model in CACHE_NAMESPACES:
+    if model._meta.auto_created:
+        m2m_changed.connect(bump_cache_version, sender=model)
+    else:
+        post_save.connect(bump_cache_version, sender=model)
+        post_delete.connect(bump_cache_version, sender=model)
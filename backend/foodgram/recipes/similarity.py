@@ -0,0 +1,177 @@
+"""
+Похожие рецепты. Рецепт — строка разреженной матрицы рецепт × признак,
+признаки — ингредиенты (вес 1) и теги (вес TAG_WEIGHT). Близость —
+косинусная, кандидатами считаются только рецепты с общим ингредиентом.
+Для каждого рецепта хранится TOP_K соседей (SimilarRecipe).
+
+Полный пересчет — команда rebuild_similar_recipes. При изменении
+ингредиентов или тегов рецепта сигналы из recipes/signals.py ставят
+в очередь задачу update_similar_recipes. Она переписывает только списки,
+которые могут измениться: список самого рецепта, списки рецептов,
+где он уже стоит (они пересчитываются точно), и списки, где его новая
+оценка выше K-й. Остальные соседи по общему ингредиенту не трогаются.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import transaction
+
+from recipes.models import Recipe, RecipeIngredientIndex, SimilarRecipe
+
+TOP_K = 10
+TAG_WEIGHT = 0.5
+
+
+def load_vectors(recipe_ids=None):
+    """Строки матрицы: {recipe_id: {(вид, id): вес}}."""
+    ingredients = RecipeIngredientIndex.objects.all()
+    tags = Recipe.tags.through.objects.all()
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        tags = tags.filter(recipe_id__in=recipe_ids)
+    vectors = defaultdict(dict)
+    rows = ingredients.values_list('recipe_id', 'ingredient_id')
+    for recipe_id, ingredient_id in rows.iterator():
+        vectors[recipe_id][('ingredient', ingredient_id)] = 1.0
+    for recipe_id, tag_id in tags.values_list('recipe_id', 'tag_id'):
+        vectors[recipe_id][('tag', tag_id)] = TAG_WEIGHT
+    return vectors
+
+
+class SimilarityIndex:
+    """Строки матрицы и столбцы-ингредиенты для поиска кандидатов."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.norms = {
+            recipe_id: math.sqrt(sum(w * w for w in vector.values()))
+            for recipe_id, vector in vectors.items()
+        }
+        self.postings = defaultdict(list)
+        for recipe_id, vector in vectors.items():
+            for feature in vector:
+                if feature[0] == 'ingredient':
+                    self.postings[feature].append(recipe_id)
+
+    def similarities(self, recipe_id):
+        """{id соседа: близость} для всех рецептов с общим ингредиентом."""
+        vector = self.vectors.get(recipe_id, {})
+        candidates = {
+            other_id
+            for feature in vector if feature[0] == 'ingredient'
+            for other_id in self.postings[feature]
+            if other_id != recipe_id
+        }
+        scores = {}
+        for other_id in candidates:
+            other = self.vectors[other_id]
+            dot = sum(
+                weight * other[feature]
+                for feature, weight in vector.items() if feature in other
+            )
+            scores[other_id] = dot / (
+                self.norms[recipe_id] * self.norms[other_id]
+            )
+        return scores
+
+
+def top(scores, k=TOP_K):
+    """[(близость, id)] по убыванию, при равенстве выше новые рецепты."""
+    return heapq.nlargest(
+        k, ((score, other_id) for other_id, score in scores.items())
+    )
+
+
+def save_neighbours(neighbours, stale):
+    """neighbours: {recipe_id: [(близость, id соседа)]}."""
+    with transaction.atomic():
+        stale.delete()
+        SimilarRecipe.objects.bulk_create(
+            [
+                SimilarRecipe(
+                    recipe_id=recipe_id, similar_id=similar_id,
+                    score=score, rank=rank
+                )
+                for recipe_id, similar in neighbours.items()
+                for rank, (score, similar_id) in enumerate(similar)
+            ],
+            batch_size=1000,
+        )
+
+
+def rebuild_similar_recipes():
+    index = SimilarityIndex(load_vectors())
+    neighbours = {
+        recipe_id: top(index.similarities(recipe_id))
+        for recipe_id in index.vectors
+    }
+    save_neighbours(neighbours, SimilarRecipe.objects.all())
+
+
+def with_shared_ingredient(recipe_ids):
+    """recipe_ids и все рецепты, у которых с ними есть общий ингредиент."""
+    ingredient_ids = RecipeIngredientIndex.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('ingredient_id')
+    return set(recipe_ids) | set(RecipeIngredientIndex.objects.filter(
+        ingredient_id__in=ingredient_ids
+    ).values_list('recipe_id', flat=True))
+
+
+def stored_neighbours(recipe_ids):
+    neighbours = defaultdict(list)
+    for recipe_id, similar_id, score in SimilarRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'similar_id', 'score'):
+        neighbours[recipe_id].append((score, similar_id))
+    return neighbours
+
+
+def update_similar_recipes(recipe_ids):
+    recipe_ids = set(recipe_ids)
+    # Списки, где рецепт уже стоит: его оценка могла упасть,
+    # и на его место может прийти кто угодно, поэтому считаем их заново.
+    listed_by = set(SimilarRecipe.objects.filter(
+        similar_id__in=recipe_ids
+    ).values_list('recipe_id', flat=True)) - recipe_ids
+    recomputed = recipe_ids | listed_by
+    index = SimilarityIndex(load_vectors(with_shared_ingredient(recomputed)))
+    scores = {
+        recipe_id: index.similarities(recipe_id) for recipe_id in recomputed
+    }
+    neighbours = {
+        recipe_id: top(recipe_scores)
+        for recipe_id, recipe_scores in scores.items()
+    }
+
+    offers = defaultdict(list)
+    for recipe_id in recipe_ids:
+        for other_id, score in scores[recipe_id].items():
+            if other_id not in recomputed:
+                offers[other_id].append((score, recipe_id))
+    # Остальным соседям рецепт нужен, только если обходит K-го в списке
+    # (сравнение то же, что в top: при равной оценке выше новый рецепт).
+    kth = {
+        recipe_id: (score, similar_id)
+        for recipe_id, score, similar_id in SimilarRecipe.objects.filter(
+            recipe_id__in=list(offers), rank=TOP_K - 1
+        ).values_list('recipe_id', 'score', 'similar_id')
+    }
+    winners = {}
+    for other_id, candidates in offers.items():
+        candidates = [
+            offer for offer in candidates
+            if other_id not in kth or offer > kth[other_id]
+        ]
+        if candidates:
+            winners[other_id] = candidates
+    stored = stored_neighbours(list(winners))
+    for other_id, candidates in winners.items():
+        neighbours[other_id] = heapq.nlargest(
+            TOP_K, stored[other_id] + candidates
+        )
+    save_neighbours(neighbours, SimilarRecipe.objects.filter(
+        recipe_id__in=neighbours
+    ))
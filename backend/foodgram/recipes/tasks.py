@@ -0,0 +1,58 @@
+"""Фоновые задачи приложения recipes, см. foodgram/tasks.py."""
+from datetime import timedelta
+
+from foodgram.tasks import PermanentError, task
+from recipes import feed, importer, popularity, similarity
+from recipes.counters import refresh_favourites_count
+from recipes.models import Recipe
+
+
+@task()
+def fan_out_recipe(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'id', 'author_id', 'pub_date'
+    ).first()
+    if recipe is not None:
+        feed.fan_out(recipe)
+
+
+@task()
+def fan_out_recipes(recipe_ids):
+    for recipe in Recipe.objects.filter(pk__in=recipe_ids).only(
+            'id', 'author_id', 'pub_date'
+    ):
+        feed.fan_out(recipe)
+
+
+@task()
+def fetch_recipe_image(recipe_id, source):
+    try:
+        importer.fetch_recipe_image(recipe_id, source)
+    except importer.ImageSourceError as error:
+        raise PermanentError(str(error)) from error
+
+
+@task()
+def update_similar_recipes(recipe_ids):
+    similarity.update_similar_recipes(recipe_ids)
+
+
+@task(periodic=timedelta(hours=1))
+def refresh_popular_recipes():
+    popularity.refresh_popular_recipes()
+
+
+@task(periodic=timedelta(days=1))
+def rebuild_similar_recipes():
+    similarity.rebuild_similar_recipes()
+
+
+@task(periodic=timedelta(days=1))
+def trim_timelines():
+    feed.trim_timelines()
+
+
+@task(periodic=timedelta(days=1))
+def reconcile_favourites_count():
+    """Страховка от расхождения денормализованного счетчика."""
+    refresh_favourites_count(Recipe.objects.values('id'))
@@ -0,0 +1,42 @@
+from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+from users.models import User
+
+
+def create_user(username, **kwargs):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        first_name=username.title(), last_name='Тестов',
+        password='Pa55word!', **kwargs
+    )
+
+
+def create_tags():
+    return [
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast'),
+        Tag.objects.create(name='Обед', color='#49B64E', slug='lunch'),
+        Tag.objects.create(name='Ужин', color='#8775D2', slug='dinner'),
+    ]
+
+
+def create_ingredients():
+    return [
+        Ingredient.objects.create(name='мука', measurement_unit='г'),
+        Ingredient.objects.create(name='молоко', measurement_unit='мл'),
+        Ingredient.objects.create(name='яйца', measurement_unit='шт.'),
+    ]
+
+
+def create_recipe(author, name, tags=(), ingredients=(), **kwargs):
+    """ingredients — пары (ингредиент, количество)."""
+    kwargs.setdefault('cooking_time', 10)
+    kwargs.setdefault('text', f'Как готовить {name}')
+    recipe = Recipe.objects.create(
+        author=author, name=name,
+        image=f'recipes/{name}.png', **kwargs
+    )
+    recipe.tags.set(tags)
+    recipe.ingredients.set([
+        IngredientAmount.objects.create(ingredient=ingredient, amount=amount)
+        for ingredient, amount in ingredients
+    ])
+    return recipe
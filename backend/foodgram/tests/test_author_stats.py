@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.author_stats import backfill_author_stats, get_author_stats
+from recipes.models import (Cart, DailyFollowerStats, DailyRecipeStats,
+                            Favourite)
+from tests.fixtures import create_recipe, create_user
+from users.models import Follow
+
+
+def snapshot(author):
+    """Ненулевые сводки автора: сигналы оставляют нули, пересборка — нет."""
+    return (
+        set(DailyRecipeStats.objects.filter(author=author).exclude(
+            favourites=0, carts=0
+        ).values_list('recipe_id', 'day', 'favourites', 'carts')),
+        set(DailyFollowerStats.objects.filter(author=author).exclude(
+            followers=0
+        ).values_list('day', 'followers')),
+    )
+
+
+class AuthorStatsTest(TestCase):
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.readers = [create_user(f'reader{n}') for n in range(3)]
+        self.pancakes = create_recipe(self.author, 'Блины')
+        self.soup = create_recipe(self.author, 'Суп')
+        self.today = timezone.localdate()
+
+    def move_to_yesterday(self, model):
+        """Переносит все записи model на вчера и пересобирает сводку."""
+        model.objects.update(
+            created=timezone.now() - timedelta(days=1)
+        )
+        backfill_author_stats([self.author.pk])
+
+    def test_incremental_rollups_match_backfill(self):
+        for reader in self.readers:
+            Favourite.objects.create(user=reader, recipe=self.pancakes)
+            Cart.objects.create(user=reader, recipe=self.soup)
+            Follow.objects.create(user=reader, author=self.author)
+        Favourite.objects.create(user=self.readers[0], recipe=self.soup)
+        Cart.objects.filter(user=self.readers[1]).delete()
+        Follow.objects.filter(user=self.readers[2]).delete()
+        incremental = snapshot(self.author)
+        backfill_author_stats([self.author.pk])
+        self.assertEqual(snapshot(self.author), incremental)
+        self.assertEqual(incremental, (
+            {
+                (self.pancakes.pk, self.today, 3, 0),
+                (self.soup.pk, self.today, 1, 2),
+            },
+            {(self.today, 2)},
+        ))
+
+    def test_delete_decrements_creation_day(self):
+        Favourite.objects.create(user=self.readers[0], recipe=self.pancakes)
+        Follow.objects.create(user=self.readers[0], author=self.author)
+        self.move_to_yesterday(Favourite)
+        self.move_to_yesterday(Follow)
+        Favourite.objects.create(user=self.readers[1], recipe=self.pancakes)
+        Follow.objects.create(user=self.readers[1], author=self.author)
+        yesterday = self.today - timedelta(days=1)
+
+        Favourite.objects.get(user=self.readers[0]).delete()
+        Follow.objects.get(user=self.readers[0]).delete()
+
+        self.assertEqual(snapshot(self.author), (
+            {(self.pancakes.pk, self.today, 1, 0)},
+            {(self.today, 1)},
+        ))
+        self.assertTrue(DailyRecipeStats.objects.filter(
+            recipe=self.pancakes, day=yesterday, favourites=0
+        ).exists())
+
+    def test_recipes_with_only_zero_days_are_excluded(self):
+        Favourite.objects.create(user=self.readers[0], recipe=self.pancakes)
+        Cart.objects.create(user=self.readers[0], recipe=self.soup)
+        Favourite.objects.filter(recipe=self.pancakes).delete()
+        stats = get_author_stats(self.author.pk, days=7)
+        self.assertEqual(
+            [recipe['id'] for recipe in stats['recipes']], [self.soup.pk]
+        )
+        self.assertEqual(
+            stats['totals'], {'favourites': 0, 'carts': 1, 'followers': 0}
+        )
+
+
+class AuthorStatsViewTest(TestCase):
+    url = '/api/users/me/stats/'
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.client = APIClient()
+        token = Token.objects.create(user=self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_anonymous_is_rejected(self):
+        self.assertEqual(APIClient().get(self.url).status_code, 401)
+
+    def test_days_is_validated(self):
+        for days in ('0', '366', 'week'):
+            with self.subTest(days=days):
+                response = self.client.get(self.url, {'days': days})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('days', response.json())
+
+    def test_days_are_dense(self):
+        recipe = create_recipe(self.author, 'Блины')
+        Favourite.objects.create(user=create_user('reader'), recipe=recipe)
+        response = self.client.get(self.url, {'days': 7})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            set(data), {'since', 'totals', 'days', 'recipes'}
+        )
+        today = timezone.localdate()
+        self.assertEqual(
+            [day['date'] for day in data['days']],
+            [str(today - timedelta(days=n)) for n in range(6, -1, -1)]
+        )
+        self.assertEqual(data['since'], data['days'][0]['date'])
+        self.assertEqual(data['days'][-1], {
+            'date': str(today), 'favourites': 1, 'carts': 0, 'followers': 0,
+        })
+        self.assertEqual(data['recipes'], [{
+            'id': recipe.pk, 'name': 'Блины', 'favourites': 1, 'carts': 0,
+            'days': [{'date': str(today), 'favourites': 1, 'carts': 0}],
+        }])
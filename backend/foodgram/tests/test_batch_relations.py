@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.db.models import Sum
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.views import FavouriteBatchView
+from recipes.models import (DailyFollowerStats, DailyRecipeStats, Favourite,
+                            Recipe, RecipeActivity, TimelineEntry)
+from tests.fixtures import create_recipe, create_tags, create_user
+
+
+class BatchRelationTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.author = create_user('author')
+        tag, *_ = create_tags()
+        cls.recipes = [
+            create_recipe(cls.author, name, tags=[tag])
+            for name in ('Блины', 'Омлет', 'Суп')
+        ]
+        cls.ids = [recipe.id for recipe in cls.recipes]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def batch(self, name, add=(), remove=()):
+        response = self.client.post(
+            reverse(f'api:{name}'),
+            {'add': list(add), 'remove': list(remove)}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return {
+            key: {row['id']: row['result'] for row in rows}
+            for key, rows in response.data.items()
+        }
+
+    def assert_favourites_counted(self, expected):
+        self.assertEqual(Favourite.objects.count(), expected)
+        self.assertEqual(
+            RecipeActivity.objects.aggregate(total=Sum('favourites'))['total'],
+            expected
+        )
+        self.assertEqual(
+            DailyRecipeStats.objects.aggregate(
+                total=Sum('favourites')
+            )['total'],
+            expected
+        )
+        self.assertEqual(
+            Recipe.objects.aggregate(
+                total=Sum('favourites_count')
+            )['total'],
+            expected
+        )
+
+    def test_add_and_remove(self):
+        result = self.batch('batch_favourites', add=self.ids + [10 ** 6])
+        self.assertEqual(
+            result['add'],
+            {**dict.fromkeys(self.ids, 'created'), 10 ** 6: 'not_found'}
+        )
+        self.assert_favourites_counted(3)
+        result = self.batch(
+            'batch_favourites', add=self.ids[:1], remove=self.ids[1:]
+        )
+        self.assertEqual(result['add'], {self.ids[0]: 'exists'})
+        self.assertEqual(
+            result['remove'], dict.fromkeys(self.ids[1:], 'deleted')
+        )
+        self.assert_favourites_counted(1)
+        result = self.batch('batch_favourites', remove=self.ids[1:])
+        self.assertEqual(
+            result['remove'], dict.fromkeys(self.ids[1:], 'absent')
+        )
+        self.assert_favourites_counted(1)
+
+    def test_batch_remove_matches_single_remove(self):
+        self.batch('batch_favourites', add=self.ids)
+        self.client.delete(
+            reverse('api:add_delete_favourites', args=[self.ids[0]])
+        )
+        self.batch('batch_favourites', remove=self.ids[1:])
+        self.assert_favourites_counted(0)
+
+    def test_row_inserted_concurrently_is_not_counted_twice(self):
+        racing_id = self.ids[0]
+        insert_relations = FavouriteBatchView.insert_relations
+
+        def racing_insert(view, target_ids):
+            # Параллельный запрос успевает вставить ту же строку
+            # после проверки существующих.
+            Favourite.objects.create(user=self.user, recipe_id=racing_id)
+            return insert_relations(view, target_ids)
+
+        with mock.patch.object(
+                FavouriteBatchView, 'insert_relations', racing_insert
+        ):
+            result = self.batch('batch_favourites', add=self.ids)
+        self.assertEqual(result['add'][racing_id], 'exists')
+        self.assertEqual(result['add'][self.ids[1]], 'created')
+        self.assert_favourites_counted(3)
+
+    def test_follow_batch_updates_timeline_and_stats(self):
+        result = self.batch(
+            'batch_subscriptions', add=[self.author.id, self.user.id]
+        )
+        self.assertEqual(
+            result['add'],
+            {self.author.id: 'created', self.user.id: 'forbidden'}
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 3
+        )
+        self.assertEqual(
+            DailyFollowerStats.objects.get(author=self.author).followers, 1
+        )
+        result = self.batch('batch_subscriptions', remove=[self.author.id])
+        self.assertEqual(result['remove'], {self.author.id: 'deleted'})
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user))
+        self.assertEqual(
+            DailyFollowerStats.objects.get(author=self.author).followers, 0
+        )
@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from foodgram import cache_versions
+from recipes.models import Tag
+from tests.fixtures import create_recipe, create_tags, create_user
+
+
+def version(namespace):
+    return cache_versions.get_versions().get(namespace, 1)
+
+
+class CacheVersionTest(TransactionTestCase):
+    """TransactionTestCase: версии поднимаются после коммита."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_waits_for_commit(self):
+        with transaction.atomic():
+            cache_versions.bump('recipes', 'tags')
+            self.assertEqual(version('recipes'), 1)
+        self.assertEqual((version('recipes'), version('tags')), (2, 2))
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                cache_versions.bump('recipes')
+                raise ValueError
+        self.assertEqual(version('recipes'), 2)
+
+    def test_key_changes_with_its_namespaces_only(self):
+        key = cache_versions.versioned_key('facets', 'recipes', 'tags')
+        self.assertEqual(key, 'facets:v1.1')
+        cache_versions.bump('carts')
+        self.assertEqual(
+            cache_versions.versioned_key('facets', 'recipes', 'tags'), key
+        )
+        cache_versions.bump('tags')
+        self.assertEqual(
+            cache_versions.versioned_key('facets', 'recipes', 'tags'),
+            'facets:v1.2'
+        )
+
+    def test_signals_bump_namespaces(self):
+        user = create_user('reader')
+        users = version('users')
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        self.assertEqual(version('users'), users)
+        tags = create_tags()
+        recipe = create_recipe(user, 'Блины')
+        recipes = version('recipes')
+        recipe.tags.add(tags[0])
+        self.assertEqual(version('recipes'), recipes + 1)
+        before = version('tags')
+        Tag.objects.get(slug='lunch').delete()
+        self.assertEqual(version('tags'), before + 1)
+
+    def test_versions_are_read_once_per_request(self):
+        def view(request):
+            with CaptureQueriesContext(connection) as queries:
+                first = cache_versions.get_versions()
+                cache_versions.bump('recipes')
+                second = cache_versions.get_versions()
+            self.assertEqual(first, second)
+            return len([
+                query for query in queries
+                if 'recipes_cacheversion' in query['sql']
+                and query['sql'].startswith('SELECT')
+            ])
+
+        middleware = cache_versions.CacheVersionMiddleware(view)
+        self.assertEqual(middleware(RequestFactory().get('/')), 1)
+        self.assertEqual(version('recipes'), 2)
+
+    def test_cached_facets_see_new_recipes(self):
+        breakfast, *_ = create_tags()
+        author = create_user('author')
+        create_recipe(author, 'Блины', tags=[breakfast])
+
+        def count():
+            response = self.client.get('/api/recipes/', {'facets': 'tags'})
+            [row] = response.json()['facets']['tags']
+            return row['count']
+
+        self.assertEqual(count(), 1)
+        self.assertEqual(count(), 1)
+        create_recipe(author, 'Омлет', tags=[breakfast])
+        self.assertEqual(count(), 2)
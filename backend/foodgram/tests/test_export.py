@@ -0,0 +1,131 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from recipes.export import iter_ndjson_gzip, iter_records
+from recipes.models import Cart, Favourite, Recipe
+from tests.fixtures import (create_ingredients, create_recipe, create_tags,
+                            create_user)
+from users.models import Follow
+
+
+def read_ndjson(data):
+    return [
+        json.loads(line) for line in gzip.decompress(data).splitlines()
+    ]
+
+
+class ExportTest(APITestCase):
+    url = '/api/export/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('admin', is_staff=True)
+        reader, author = create_user('reader'), create_user('author')
+        breakfast, lunch, _ = create_tags()
+        flour, milk, _ = create_ingredients()
+        cls.old = create_recipe(author, 'Каша', tags=[lunch])
+        cls.new = create_recipe(
+            author, 'Блины', tags=[breakfast, lunch],
+            ingredients=[(flour, 200), (milk, 300)]
+        )
+        cls.since = timezone.now() - timedelta(days=1)
+        Recipe.objects.filter(pk=cls.old.pk).update(
+            pub_date=cls.since - timedelta(days=1)
+        )
+        Favourite.objects.create(user=reader, recipe=cls.new)
+        old_cart = Cart.objects.create(user=reader, recipe=cls.old)
+        Cart.objects.filter(pk=old_cart.pk).update(
+            created=cls.since - timedelta(days=1)
+        )
+        Cart.objects.create(user=reader, recipe=cls.new)
+        Follow.objects.create(user=reader, author=author)
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        return read_ndjson(b''.join(response.streaming_content))
+
+    def test_round_trip(self):
+        records = self.export()
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['recipe', 'recipe', 'favourite', 'cart', 'cart', 'follow']
+        )
+        recipe = records[1]
+        self.assertEqual(
+            (recipe['id'], recipe['name'], recipe['tags']),
+            (self.new.id, 'Блины', ['breakfast', 'lunch'])
+        )
+        self.assertEqual(
+            [(item['name'], item['amount']) for item in recipe['ingredients']],
+            [('мука', 200), ('молоко', 300)]
+        )
+        self.assertEqual(records[0]['ingredients'], [])
+
+    def test_since_and_tables(self):
+        records = self.export(
+            since=self.since.isoformat(), tables='recipes,carts'
+        )
+        self.assertEqual(
+            [(record['type'], record.get('id', record.get('recipe_id')))
+             for record in records],
+            [('recipe', self.new.id), ('cart', self.new.id)]
+        )
+        day = self.since.date().isoformat()
+        self.assertEqual(len(self.export(since=day, tables='carts')), 1)
+
+    def test_invalid_params(self):
+        for params in (
+                {'tables': 'recipes,users'}, {'since': 'вчера'},
+                {'since': '2022-13-01'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(set(response.data), set(params))
+
+    def test_admin_only(self):
+        self.client.force_authenticate(create_user('someone'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_chunks_do_not_change_output(self):
+        records = list(iter_records())
+        self.assertEqual(list(iter_records(chunk_size=1)), records)
+        with mock.patch('recipes.export.FLUSH_SIZE', 1):
+            parts = list(iter_ndjson_gzip(records))
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(
+            read_ndjson(b''.join(parts)),
+            json.loads(json.dumps(records, cls=DjangoJSONEncoder))
+        )
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.ndjson.gz')
+            call_command(
+                'export_data', output=path, tables='follows',
+                stdout=StringIO()
+            )
+            with open(path, 'rb') as export_file:
+                records = read_ndjson(export_file.read())
+        self.assertEqual([record['type'] for record in records], ['follow'])
+        with self.assertRaises(CommandError):
+            call_command('export_data', output=path, tables='users')
+        with self.assertRaises(CommandError):
+            call_command('export_data', output=path, since='вчера')
@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from rest_framework.request import Request
+from rest_framework.test import (APIRequestFactory, APITestCase,
+                                 force_authenticate)
+
+from api.facets import get_cache_key
+from recipes.models import Favourite
+from tests.fixtures import create_recipe, create_tags, create_user
+
+
+class FacetCacheKeyTest(TransactionTestCase):
+    """TransactionTestCase: версии кэша поднимаются после коммита."""
+
+    def setUp(self):
+        self.user = create_user('reader')
+        self.recipe = create_recipe(
+            create_user('author'), 'Блины', tags=create_tags()
+        )
+
+    def get_key(self, user=None, action='list', **params):
+        request = APIRequestFactory().get('/api/recipes/', params)
+        if user is not None:
+            force_authenticate(request, user)
+        return get_cache_key(Request(request), action)
+
+    def test_key_ignores_param_order_and_spacing(self):
+        self.assertEqual(
+            self.get_key(ingredients_include='2, 1', search=' Суп  '),
+            self.get_key(ingredients_include='1,2', search='суп')
+        )
+
+    def test_shared_key_survives_personal_data_changes(self):
+        anonymous = self.get_key(author=1)
+        shared = self.get_key(self.user, author=1)
+        personal = self.get_key(self.user, is_favorited=1)
+        feed = self.get_key(self.user, action='feed')
+        self.assertEqual(anonymous, shared)
+        Favourite.objects.create(user=self.user, recipe=self.recipe)
+        self.assertEqual(self.get_key(author=1), anonymous)
+        self.assertEqual(self.get_key(self.user, author=1), shared)
+        self.assertNotEqual(
+            self.get_key(self.user, is_favorited=1), personal
+        )
+        self.assertNotEqual(self.get_key(self.user, action='feed'), feed)
+
+    def test_recipe_changes_reset_shared_key(self):
+        shared = self.get_key(author=1)
+        self.recipe.tags.clear()
+        self.assertNotEqual(self.get_key(author=1), shared)
+
+
+class TagFacetCountTest(APITestCase):
+    url = '/api/recipes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.first, cls.second = create_user('first'), create_user('second')
+        breakfast, lunch, dinner = create_tags()
+        cls.recipes = [
+            create_recipe(cls.first, 'Блины', tags=[breakfast, lunch]),
+            create_recipe(cls.first, 'Омлет', tags=[breakfast]),
+            create_recipe(
+                cls.second, 'Плов', tags=[lunch, dinner], cooking_time=60
+            ),
+            create_recipe(cls.second, 'Хлеб'),
+        ]
+        for recipe in cls.recipes[::2]:
+            Favourite.objects.create(user=cls.reader, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        response = self.client.get(
+            self.url, {'facets': 'tags', 'limit': 10, **params}
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        facets = response.data['facets']['tags']
+        return (
+            {row['slug']: row['count'] for row in facets},
+            {recipe['id'] for recipe in response.data['results']}
+        )
+
+    def ids(self, *numbers):
+        return {self.recipes[number].id for number in numbers}
+
+    def test_counts_without_tag_filter(self):
+        all_tags = {'breakfast': 2, 'lunch': 2, 'dinner': 1}
+        self.assertEqual(self.get(), (all_tags, self.ids(0, 1, 2, 3)))
+        self.assertEqual(
+            self.get(author=self.second.id),
+            ({'lunch': 1, 'dinner': 1}, self.ids(2, 3))
+        )
+        self.assertEqual(
+            self.get(cooking_time_max=30),
+            ({'breakfast': 2, 'lunch': 1}, self.ids(0, 1, 3))
+        )
+
+    def test_tag_filter_does_not_narrow_its_own_counts(self):
+        all_tags = {'breakfast': 2, 'lunch': 2, 'dinner': 1}
+        self.assertEqual(
+            self.get(tags='breakfast'), (all_tags, self.ids(0, 1))
+        )
+        self.assertEqual(
+            self.get(tags=['breakfast', 'dinner']),
+            (all_tags, self.ids(0, 1, 2))
+        )
+        self.assertEqual(
+            self.get(tags='breakfast', author=self.second.id),
+            ({'lunch': 1, 'dinner': 1}, set())
+        )
+
+    def test_personal_filters(self):
+        self.client.force_authenticate(self.reader)
+        self.assertEqual(
+            self.get(is_favorited=1, tags='dinner'),
+            ({'breakfast': 1, 'lunch': 2, 'dinner': 1}, self.ids(2))
+        )
+        self.client.force_authenticate(self.first)
+        self.assertEqual(self.get(is_favorited=1), ({}, set()))
@@ -0,0 +1,72 @@
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import fast_serializers, serializers
+from recipes.models import Ingredient, Recipe, Tag
+from tests.fixtures import (create_ingredients, create_recipe, create_tags,
+                            create_user)
+
+
+class ValuesSerializerParityTest(TestCase):
+    """Быстрые сериализаторы отдают те же байты, что и ModelSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        breakfast, lunch, dinner = create_tags()
+        flour, milk, eggs = create_ingredients()
+        alice = create_user('alice')
+        bob = create_user('bob')
+        create_recipe(
+            alice, 'Блины', tags=[dinner, breakfast],
+            ingredients=[(flour, 200), (milk, 0.5), (eggs, 2)]
+        )
+        create_recipe(bob, 'Омлет', tags=[breakfast], ingredients=[(eggs, 3)])
+        create_recipe(
+            bob, 'Суп', tags=[lunch], ingredients=[(milk, 1.25)],
+            cooking_time=45
+        )
+
+    def setUp(self):
+        self.request = Request(APIRequestFactory().get('/api/recipes/'))
+
+    def assert_same_json(self, fast, expected):
+        self.assertEqual(
+            JSONRenderer().render(fast), JSONRenderer().render(expected)
+        )
+
+    def test_ingredients(self):
+        queryset = Ingredient.objects.all()
+        fast = fast_serializers.IngredientValuesSerializer()
+        self.assert_same_json(
+            fast.serialize(fast.get_values(queryset)),
+            serializers.IngredientSerializer(queryset, many=True).data
+        )
+
+    def test_tags(self):
+        queryset = Tag.objects.all()
+        fast = fast_serializers.TagValuesSerializer()
+        self.assert_same_json(
+            fast.serialize(fast.get_values(queryset)),
+            serializers.TagSerializer(queryset, many=True).data
+        )
+
+    def assert_recipes_match(self, fields):
+        queryset = Recipe.objects.all()
+        context = {'request': self.request, 'fields': fields}
+        fast = fast_serializers.RecipeAnonymousValuesSerializer(context)
+        self.assert_same_json(
+            fast.serialize(fast.get_values(queryset)),
+            serializers.RecipeSerializerAnonymous(
+                queryset, many=True, context=context
+            ).data
+        )
+
+    def test_recipes(self):
+        self.assert_recipes_match(None)
+
+    def test_recipes_sparse_fields(self):
+        # RecipeView.get_requested_fields отдает поля в порядке Meta.fields.
+        self.assert_recipes_match(['id', 'tags', 'image', 'name', 'author'])
+        self.assert_recipes_match(['id', 'ingredients', 'cooking_time'])
@@ -0,0 +1,169 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from recipes import feed
+from recipes.models import Recipe, TimelineEntry
+from tests.fixtures import create_recipe, create_tags, create_user
+from users.models import Follow
+
+
+def publish(author, name, days_ago, tags=()):
+    """Рецепт с датой публикации days_ago дней назад, разложенный по лентам."""
+    recipe = create_recipe(author, name, tags=tags)
+    Recipe.objects.filter(pk=recipe.pk).update(
+        pub_date=timezone.now() - timedelta(days=days_ago)
+    )
+    recipe.refresh_from_db()
+    feed.fan_out(recipe)
+    return recipe
+
+
+def timeline(user):
+    return list(TimelineEntry.objects.filter(user=user).order_by(
+        '-pub_date'
+    ).values_list('recipe_id', flat=True))
+
+
+class TimelineTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.readers = [create_user('first'), create_user('second')]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fan_out_reaches_followers_only(self):
+        Follow.objects.create(user=self.readers[0], author=self.author)
+        recipe = publish(self.author, 'Блины', 0)
+        self.assertEqual(timeline(self.readers[0]), [recipe.id])
+        self.assertEqual(timeline(self.readers[1]), [])
+        entry = TimelineEntry.objects.get(recipe=recipe)
+        self.assertEqual(entry.pub_date, recipe.pub_date)
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_big_author_is_not_fanned_out(self):
+        for reader in self.readers:
+            Follow.objects.create(user=reader, author=self.author)
+        publish(self.author, 'Блины', 0)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(FEED_TIMELINE_LENGTH=2)
+    def test_follow_backfills_and_unfollow_removes(self):
+        recipes = [
+            publish(self.author, f'Рецепт {days}', days) for days in (3, 1, 2)
+        ]
+        follow = Follow.objects.create(
+            user=self.readers[0], author=self.author
+        )
+        self.assertEqual(
+            timeline(self.readers[0]), [recipes[1].id, recipes[2].id]
+        )
+        follow.delete()
+        self.assertEqual(timeline(self.readers[0]), [])
+
+    def test_trim_keeps_newest_entries(self):
+        Follow.objects.create(user=self.readers[0], author=self.author)
+        recipes = [
+            publish(self.author, f'Рецепт {days}', days) for days in (3, 1, 2)
+        ]
+        with self.settings(FEED_TIMELINE_LENGTH=2):
+            self.assertEqual(feed.trim_timelines(), 1)
+        self.assertEqual(
+            timeline(self.readers[0]), [recipes[1].id, recipes[2].id]
+        )
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=2)
+class FeedViewTest(APITestCase):
+    url = '/api/recipes/feed/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.tags = create_tags()
+        small, big, stranger = (
+            create_user('small'), create_user('big'), create_user('stranger')
+        )
+        Follow.objects.create(user=cls.reader, author=small)
+        Follow.objects.create(user=cls.reader, author=big)
+        Follow.objects.create(user=stranger, author=big)
+        # Два подписчика: Плов еще разложен, но big уже подмешивается
+        # при чтении, повтор убирает UNION.
+        pilaf = publish(big, 'Плов', 4)
+        # С третьим подписчиком рецепты big только подмешиваются.
+        Follow.objects.create(user=small, author=big)
+        cls.expected = [
+            publish(small, 'Блины', 1, tags=cls.tags[:1]).id,
+            publish(big, 'Суп', 2, tags=cls.tags[1:2]).id,
+            publish(small, 'Омлет', 3, tags=cls.tags[:1]).id,
+            pilaf.id,
+        ]
+        publish(stranger, 'Чужой', 0)
+        # Не разложен по ленте и автор не крупный: в ленте его нет.
+        create_recipe(small, 'Черновик')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.reader)
+
+    def get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_feed_merges_timeline_and_big_authors(self):
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.reader
+            ).values_list('recipe_id', flat=True)),
+            {self.expected[0], self.expected[2], self.expected[3]}
+        )
+        data = self.get()
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(
+            [recipe['id'] for recipe in data['results']], self.expected
+        )
+
+    def test_pages(self):
+        pages = [self.get(limit=3, page=page) for page in (1, 2)]
+        self.assertEqual(
+            [recipe['id'] for page in pages for recipe in page['results']],
+            self.expected
+        )
+        self.assertIsNone(pages[1]['next'])
+
+    def test_filters_and_facets(self):
+        data = self.get(tags='breakfast', facets='tags')
+        self.assertEqual(
+            [recipe['id'] for recipe in data['results']],
+            [self.expected[0], self.expected[2]]
+        )
+        self.assertEqual(
+            {tag['slug']: tag['count'] for tag in data['facets']['tags']},
+            {'breakfast': 2, 'lunch': 1}
+        )
+
+    def test_anonymous(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=2)
+class BigAuthorsCacheTest(TransactionTestCase):
+    """TransactionTestCase: версия подписок поднимается после коммита."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_follow_refreshes_cached_big_authors(self):
+        author = create_user('author')
+        Follow.objects.create(user=create_user('first'), author=author)
+        self.assertEqual(feed.get_big_authors(), set())
+        Follow.objects.create(user=create_user('second'), author=author)
+        self.assertEqual(feed.get_big_authors(), {author.id})
@@ -0,0 +1,176 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+from urllib.request import Request as UrlRequest
+
+from django.contrib.auth.models import Permission
+from django.test import (SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from rest_framework.test import APITestCase
+
+from foodgram.tasks import claim, execute
+from recipes import tasks
+from recipes.importer import (ImageSourceError, PublicHTTPConnection,
+                              PublicRedirectHandler, parse_row, read_image)
+from recipes.models import Recipe, Task
+from tests.fixtures import create_ingredients, create_tags, create_user
+
+
+class ImportPermissionTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = create_tags()
+        cls.ingredients = create_ingredients()
+
+    def import_rows(self, user, rows):
+        self.client.force_authenticate(user)
+        return self.client.post(
+            '/api/recipes/import/',
+            '\n'.join(json.dumps(row) for row in rows),
+            content_type='application/x-ndjson'
+        )
+
+    def make_row(self, number):
+        return {
+            'name': f'Рецепт {number}', 'text': 'Описание',
+            'cooking_time': number, 'image': 'https://example.com/a.png',
+            'tags': [self.tags[number % 3].id],
+            'ingredients': [
+                {'id': self.ingredients[number % 3].id, 'amount': number},
+            ],
+        }
+
+    def test_regular_user_is_forbidden(self):
+        response = self.import_rows(create_user('reader'), [self.make_row(1)])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_partner_permission(self):
+        partner = create_user('partner')
+        partner.user_permissions.add(
+            Permission.objects.get(codename='import_recipes')
+        )
+        response = self.import_rows(partner, [self.make_row(1)])
+        self.assertEqual(response.status_code, 201)
+
+    def test_rows_keep_their_relations(self):
+        rows = [self.make_row(number) for number in range(1, 8)]
+        response = self.import_rows(
+            create_user('admin', is_staff=True), rows
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], len(rows))
+        for result, row in zip(response.data['rows'], rows):
+            recipe = Recipe.objects.get(pk=result['id'])
+            self.assertEqual(recipe.cooking_time, row['cooking_time'])
+            self.assertEqual(
+                list(recipe.tags.values_list('id', flat=True)), row['tags']
+            )
+            self.assertEqual(
+                list(recipe.ingredients.values_list(
+                    'ingredient_id', 'amount'
+                )),
+                [(item['id'], item['amount']) for item in row['ingredients']]
+            )
+
+
+class PublicRedirectHandlerTest(SimpleTestCase):
+
+    def redirect(self, url):
+        return PublicRedirectHandler().redirect_request(
+            UrlRequest('http://93.184.216.34/image.png'), None, 302,
+            'Found', {}, url
+        )
+
+    def test_internal_redirect_is_rejected(self):
+        for url in (
+                'http://169.254.169.254/latest/meta-data/',
+                'http://127.0.0.1:8000/admin/',
+                'http://10.0.0.1/image.png',
+                'file:///etc/passwd',
+        ):
+            with self.subTest(url=url):
+                with self.assertRaises(ImageSourceError):
+                    self.redirect(url)
+
+    def test_public_redirect_is_followed(self):
+        request = self.redirect('https://93.184.216.34/other.png')
+        self.assertEqual(
+            request.full_url, 'https://93.184.216.34/other.png'
+        )
+
+
+class ParseRowTest(SimpleTestCase):
+    row = {
+        'name': 'Блины', 'text': 'Описание', 'cooking_time': 10,
+        'image': 'https://example.com/a.png', 'tags': [1],
+        'ingredients': [{'id': 1, 'amount': 2}],
+    }
+
+    def test_booleans_are_not_integers(self):
+        for field, value, error in (
+                ('cooking_time', True, 'cooking_time'),
+                ('tags', [True], 'tags'),
+                ('ingredients', [{'id': True, 'amount': 2}], 'ingredients'),
+                ('ingredients', [{'id': 1, 'amount': True}], 'ingredients'),
+        ):
+            with self.subTest(field=field, value=value):
+                _, errors = parse_row(json.dumps({**self.row, field: value}))
+                self.assertIn(error, errors)
+
+    def test_valid_row(self):
+        row, errors = parse_row(json.dumps(self.row))
+        self.assertEqual(errors, {})
+        self.assertEqual(row['ingredients'], [(1, 2.0)])
+
+
+def address(ip):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (ip, 80))]
+
+
+class PublicConnectionTest(SimpleTestCase):
+
+    @mock.patch('socket.create_connection')
+    @mock.patch('socket.getaddrinfo')
+    def test_connects_to_checked_address(self, getaddrinfo, create):
+        # Второй ответ DNS — внутренний адрес: до него дойти не должно.
+        getaddrinfo.side_effect = [
+            address('93.184.216.34'), address('127.0.0.1'),
+        ]
+        PublicHTTPConnection('example.com', 80, timeout=5).connect()
+        getaddrinfo.assert_called_once()
+        create.assert_called_once_with(('93.184.216.34', 80), 5)
+
+    @mock.patch('socket.create_connection')
+    @mock.patch('socket.getaddrinfo', return_value=address('10.0.0.1'))
+    def test_internal_address_is_not_connected(self, getaddrinfo, create):
+        with self.assertRaises(ImageSourceError):
+            PublicHTTPConnection('example.com', 80, timeout=5).connect()
+        create.assert_not_called()
+
+    def test_local_server_is_unreachable(self):
+        server = HTTPServer(('127.0.0.1', 0), BaseHTTPRequestHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with self.assertRaises(ImageSourceError):
+                read_image(f'http://127.0.0.1:{server.server_port}/a.png')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+@override_settings(TASKS_EAGER=False)
+class FetchImageTaskTest(TransactionTestCase):
+    """TransactionTestCase: execute закрывает соединения потока."""
+
+    def test_permanent_error_is_not_retried(self):
+        task = tasks.fetch_recipe_image.enqueue(1, 'http://10.0.0.1/a.png')
+        with self.assertLogs('foodgram.tasks', 'ERROR'):
+            execute(*claim(1)[0])
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 1))
+        self.assertIn('10.0.0.1', task.last_error)
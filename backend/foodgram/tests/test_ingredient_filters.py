@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from recipes.models import RecipeIngredientIndex
+from tests.fixtures import create_ingredients, create_recipe, create_user
+
+
+def index_rows():
+    return set(RecipeIngredientIndex.objects.values_list(
+        'recipe_id', 'ingredient_id'
+    ))
+
+
+class IngredientFilterTest(APITestCase):
+    url = '/api/recipes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.flour, cls.milk, cls.eggs = create_ingredients()
+        cls.pancakes, cls.omelette, cls.porridge, cls.bread = (
+            create_recipe(
+                author, name,
+                ingredients=[(ingredient, 1) for ingredient in ingredients]
+            )
+            for name, ingredients in (
+                ('Блины', (cls.flour, cls.milk, cls.eggs)),
+                ('Омлет', (cls.milk, cls.eggs)),
+                ('Каша', (cls.milk,)),
+                ('Хлеб', (cls.flour,)),
+            )
+        )
+
+    def ids(self, **params):
+        params = {
+            param: ','.join(str(item.id) for item in value)
+            for param, value in params.items()
+        }
+        response = self.client.get(self.url, {'limit': 10, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return {recipe['id'] for recipe in response.data['results']}
+
+    def test_filters(self):
+        pancakes, omelette, porridge, bread = (
+            recipe.id for recipe in (
+                self.pancakes, self.omelette, self.porridge, self.bread
+            )
+        )
+        cases = (
+            ({'ingredients_include': [self.flour, self.milk]}, {pancakes}),
+            (
+                {'ingredients_include': [self.milk]},
+                {pancakes, omelette, porridge}
+            ),
+            ({'ingredients_exclude': [self.flour]}, {omelette, porridge}),
+            (
+                {'ingredients_available': [self.milk, self.eggs]},
+                {omelette, porridge}
+            ),
+            (
+                {'ingredients_include': [self.eggs],
+                 'ingredients_exclude': [self.flour]},
+                {omelette}
+            ),
+            (
+                {'ingredients_available': [self.flour, self.milk],
+                 'ingredients_include': [self.flour]},
+                {bread}
+            ),
+        )
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self.ids(**params), expected)
+
+    def test_invalid_ids(self):
+        response = self.client.get(
+            self.url, {'ingredients_include': '1,abc'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ingredients_include', response.data)
+
+    def test_index_follows_ingredient_changes(self):
+        amount = self.porridge.ingredients.get()
+        amount.ingredient = self.eggs
+        amount.save()
+        self.assertEqual(
+            self.ids(ingredients_include=[self.eggs]),
+            {self.pancakes.id, self.omelette.id, self.porridge.id}
+        )
+        self.omelette.ingredients.remove(
+            self.omelette.ingredients.get(ingredient=self.eggs)
+        )
+        self.assertNotIn(
+            (self.omelette.id, self.eggs.id), index_rows()
+        )
+
+    def test_rebuild_restores_index(self):
+        expected = index_rows()
+        self.assertEqual(len(expected), 7)
+        RecipeIngredientIndex.objects.all().delete()
+        call_command('rebuild_ingredient_index', stdout=StringIO())
+        self.assertEqual(index_rows(), expected)
+        RecipeIngredientIndex.objects.filter(
+            recipe=self.pancakes
+        ).delete()
+        RecipeIngredientIndex.objects.create(
+            recipe=self.pancakes, ingredient=self.eggs
+        )
+        call_command('rebuild_ingredient_index', stdout=StringIO())
+        self.assertEqual(index_rows(), expected)
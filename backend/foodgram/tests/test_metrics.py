@@ -0,0 +1,24 @@
+from django.test import TestCase, override_settings
+
+
+class MetricsAccessTest(TestCase):
+    url = '/metrics/'
+
+    def test_disabled_without_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_requires_token(self):
+        for header in (None, 'Bearer wrong', 's3cret', 'Bearer s3cret '):
+            with self.subTest(header=header):
+                extra = {} if header is None else {
+                    'HTTP_AUTHORIZATION': header
+                }
+                response = self.client.get(self.url, **extra)
+                self.assertEqual(response.status_code, 401)
+                self.assertNotIn(b'foodgram_', response.content)
+        response = self.client.get(
+            self.url, HTTP_AUTHORIZATION='Bearer s3cret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'foodgram_http_', response.content)
@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from recipes import popularity
+from recipes.models import Favourite, PopularRecipe, RecipeActivity
+from tests.fixtures import create_recipe, create_user
+
+
+def popular(window):
+    return list(PopularRecipe.objects.filter(window=window).values_list(
+        'recipe_id', 'score'
+    ))
+
+
+class PopularWindowsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.fresh, cls.recent, cls.old = (
+            create_recipe(author, name) for name in ('Блины', 'Суп', 'Плов')
+        )
+
+    def test_windows_and_weights(self):
+        now = timezone.now()
+        for recipe, age, field, times in (
+                (self.fresh, timedelta(hours=1), 'carts', 3),
+                (self.recent, timedelta(days=3), 'favourites', 2),
+                (self.recent, timedelta(days=3), 'carts', 1),
+                (self.old, timedelta(days=30), 'favourites', 5),
+        ):
+            for _ in range(times):
+                popularity.record_activity([recipe.id], now - age, field)
+        popularity.refresh_popular_recipes(now)
+        self.assertEqual(popular(PopularRecipe.DAY), [(self.fresh.id, 3)])
+        self.assertEqual(
+            popular(PopularRecipe.WEEK),
+            [(self.recent.id, 5), (self.fresh.id, 3)]
+        )
+        self.assertEqual(
+            popular(PopularRecipe.ALL),
+            [(self.old.id, 10), (self.recent.id, 5), (self.fresh.id, 3)]
+        )
+
+    def test_removal_reverts_the_hour_it_was_added(self):
+        favourite = Favourite.objects.create(
+            user=create_user('reader'), recipe=self.fresh
+        )
+        # Запись двухдневной давности с ее сводкой.
+        RecipeActivity.objects.all().delete()
+        Favourite.objects.filter(pk=favourite.pk).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        favourite.refresh_from_db()
+        popularity.record_activity(
+            [self.fresh.id], favourite.created, 'favourites'
+        )
+        favourite.delete()
+        self.assertEqual(
+            list(RecipeActivity.objects.values_list('hour', 'favourites')),
+            [(popularity.truncate_hour(favourite.created), 0)]
+        )
+
+    def test_top_n_and_ties(self):
+        author = create_user('chef')
+        recipes = [
+            create_recipe(author, f'Рецепт {number}')
+            for number in range(popularity.TOP_N + 1)
+        ]
+        popularity.record_activity(
+            [recipe.id for recipe in recipes], timezone.now(), 'carts'
+        )
+        popularity.refresh_popular_recipes()
+        ids = [recipe_id for recipe_id, _ in popular(PopularRecipe.DAY)]
+        self.assertEqual(
+            ids, sorted(recipe.id for recipe in recipes)[::-1][:len(ids)]
+        )
+        self.assertEqual(len(ids), popularity.TOP_N)
+
+
+class PopularEndpointTest(TransactionTestCase):
+    """TransactionTestCase: пересчет поднимает версию кэша после коммита."""
+    url = '/api/recipes/popular/'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_refresh_replaces_cached_list(self):
+        author, reader = create_user('author'), create_user('reader')
+        pancakes = create_recipe(author, 'Блины')
+        soup = create_recipe(author, 'Суп')
+        Favourite.objects.create(user=reader, recipe=pancakes)
+        call_command('refresh_popular_recipes', stdout=StringIO())
+        response = self.client.get(self.url, {'window': 'day'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['id'], row['name'], row['score'])
+             for row in response.json()],
+            [(pancakes.id, 'Блины', 2)]
+        )
+        Favourite.objects.create(user=reader, recipe=soup)
+        Favourite.objects.create(user=author, recipe=soup)
+        self.assertEqual(len(self.client.get(self.url).json()), 1)
+        call_command('refresh_popular_recipes', stdout=StringIO())
+        self.assertEqual(
+            [row['id'] for row in self.client.get(self.url).json()],
+            [soup.id, pancakes.id]
+        )
+
+    def test_invalid_window(self):
+        response = self.client.get(self.url, {'window': 'month'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('window', response.json())
@@ -0,0 +1,55 @@
+from rest_framework.test import APITestCase
+
+from api.views import RecipeView
+from tests.fixtures import create_recipe, create_user
+
+
+class RecipeBatchTest(APITestCase):
+    url = '/api/recipes/batch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        author = create_user('author')
+        cls.ids = [
+            create_recipe(author, name).id
+            for name in ('Блины', 'Омлет', 'Суп')
+        ]
+
+    def get(self, ids, status=200):
+        response = self.client.get(self.url, {'ids': ids})
+        self.assertEqual(response.status_code, status, response.data)
+        return response.data
+
+    def test_order_duplicates_and_missing(self):
+        first, second, third = self.ids
+        missing = third + 100
+        ids = f'{third},{missing},{first},{third}'
+        for user in (None, self.user):
+            self.client.force_authenticate(user)
+            with self.subTest(user=user):
+                data = self.get(ids)
+                self.assertEqual(
+                    [recipe['id'] for recipe in data['results']],
+                    [third, first]
+                )
+                self.assertEqual(data['missing'], [missing])
+        data = self.get([str(second), f'{first}, {second}'])
+        self.assertEqual(
+            [recipe['id'] for recipe in data['results']], [second, first]
+        )
+
+    def test_limits(self):
+        limit = RecipeView.batch_max_size
+        self.assertEqual(limit, 50)
+        data = self.get(','.join(str(pk) for pk in range(1, limit + 1)))
+        self.assertEqual(len(data['results']) + len(data['missing']), limit)
+        for ids in (
+                ','.join(str(pk) for pk in range(1, limit + 2)), '',
+                '1,abc', '-1',
+        ):
+            with self.subTest(ids=ids[:20]):
+                self.assertIn('ids', self.get(ids, status=400))
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
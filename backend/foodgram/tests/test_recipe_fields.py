@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.views import RecipeView
+from tests.fixtures import (create_ingredients, create_recipe, create_tags,
+                            create_user)
+
+ALL_FIELDS = {
+    'id', 'tags', 'author', 'ingredients', 'image', 'is_favorited', 'name',
+    'text', 'cooking_time', 'is_in_shopping_cart',
+}
+
+
+class RecipeFieldsTest(APITestCase):
+    url = '/api/recipes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        flour, milk, _ = create_ingredients()
+        cls.recipes = [
+            create_recipe(
+                create_user(f'author{number}'), f'Блины {number}',
+                tags=create_tags() if number == 0 else (),
+                ingredients=[(flour, 200), (milk, 300)]
+            )
+            for number in range(2)
+        ]
+
+    def get(self, url=url, status=200, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status, response.data)
+        return response.data
+
+    def keys(self, url=url, **params):
+        data = self.get(url, **params)
+        rows = data['results'] if 'results' in data else [data]
+        return {frozenset(row) for row in rows}
+
+    def test_sparse_fields_for_both_serializers(self):
+        detail = f'{self.url}{self.recipes[0].id}/'
+        personal = {'is_favorited', 'is_in_shopping_cart'}
+        for user, available in (
+                (None, ALL_FIELDS - personal), (self.user, ALL_FIELDS)
+        ):
+            self.client.force_authenticate(user)
+            with self.subTest(user=user):
+                self.assertEqual(
+                    self.keys(),
+                    {frozenset(available & set(RecipeView.list_fields))}
+                )
+                self.assertEqual(self.keys(detail), {frozenset(available)})
+                self.assertEqual(
+                    self.keys(fields='name, cooking_time,is_favorited'),
+                    {frozenset(available & {
+                        'id', 'name', 'cooking_time', 'is_favorited'
+                    })}
+                )
+                self.assertEqual(
+                    self.keys(detail, omit='text,ingredients,id'),
+                    {frozenset(available - {'text', 'ingredients'})}
+                )
+
+    def test_invalid_fields(self):
+        for params in (
+                {'fields': 'bogus'}, {'fields': 'name,bogus'},
+                {'fields': ''}, {'fields': ' , '}, {'omit': 'bogus'},
+        ):
+            with self.subTest(params=params):
+                data = self.get(status=400, **params)
+                self.assertEqual(set(data), set(params))
+
+    def test_queries_follow_requested_fields(self):
+        self.client.force_authenticate(self.user)
+
+        def sql(**params):
+            with CaptureQueriesContext(connection) as queries:
+                self.get(**params)
+            return ' '.join(query['sql'] for query in queries)
+
+        full = sql(fields=','.join(sorted(ALL_FIELDS)))
+        for table in (
+                'recipes_tag', 'recipes_ingredientamount',
+                'recipes_favourite', 'recipes_cart', 'users_follow',
+        ):
+            self.assertIn(table, full)
+        sparse = sql(fields='name')
+        for table in (
+                'recipes_tag', 'recipes_ingredientamount',
+                'recipes_favourite', 'recipes_cart', 'users_follow',
+                'users_user" INNER JOIN',
+        ):
+            self.assertNotIn(table, sparse)
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.filters import RecipeFilterCustom
+from recipes.models import Recipe
+from tests.fixtures import create_recipe, create_user
+
+# Признак отдельной сортировки в плане запроса.
+SORT_MARKERS = {
+    'sqlite': 'USE TEMP B-TREE',
+    'postgresql': 'Sort',
+}
+
+
+class RecipeIndexPlanTest(TestCase):
+    """Сортировки и фильтр по времени приготовления идут по индексам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        for minutes in (5, 15, 30, 60):
+            create_recipe(author, f'Рецепт {minutes}', cooking_time=minutes)
+
+    def setUp(self):
+        if connection.vendor not in SORT_MARKERS:
+            self.skipTest(f'Нет проверки плана для {connection.vendor}')
+        if connection.vendor == 'postgresql':
+            # На паре строк полный просмотр дешевле любого индекса.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def get_plan(self, **params):
+        request = Request(APIRequestFactory().get('/api/recipes/', params))
+        queryset = RecipeFilterCustom().filter_queryset(
+            request, Recipe.objects.all(), None
+        )
+        return queryset[:10].explain()
+
+    def assert_uses_index(self, index, **params):
+        plan = self.get_plan(**params)
+        self.assertIn(index, plan)
+        self.assertNotIn(SORT_MARKERS[connection.vendor], plan)
+
+    def test_default_ordering(self):
+        self.assert_uses_index('recipe_pub_date_idx')
+        self.assert_uses_index('recipe_pub_date_idx', ordering='newest')
+
+    def test_fastest(self):
+        self.assert_uses_index('recipe_cooking_time_idx', ordering='fastest')
+
+    def test_popular(self):
+        self.assert_uses_index('recipe_popular_idx', ordering='popular')
+
+    def test_cooking_time_range(self):
+        self.assert_uses_index(
+            'recipe_cooking_time_idx', ordering='fastest',
+            cooking_time_min=10, cooking_time_max=40
+        )
@@ -0,0 +1,88 @@
+import threading
+
+from django.db import connections
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from recipes.models import Cart, Favourite
+from tests.fixtures import create_recipe, create_tags, create_user
+
+THREADS = 8
+
+
+class RecipeRelationTest(TransactionTestCase):
+    """
+    TransactionTestCase: внешний ключ проверяется при коммите,
+    а потокам нужны собственные соединения к закоммиченным данным.
+    """
+
+    def setUp(self):
+        self.user = create_user('reader')
+        self.recipe = create_recipe(
+            create_user('author'), 'Блины', tags=create_tags()[:1]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def url(self, name, recipe_id=None):
+        return reverse(
+            f'api:{name}', args=[recipe_id or self.recipe.id]
+        )
+
+    def test_add_twice(self):
+        url = self.url('add_delete_favourites')
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            set(response.data), {'id', 'name', 'image', 'cooking_time'}
+        )
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Favourite.objects.count(), 1)
+
+    def test_missing_recipe(self):
+        recipe_id = self.recipe.id
+        self.recipe.delete()
+        for name in ('add_delete_favourites', 'add_delete_recipes_from_cart'):
+            response = self.client.post(self.url(name, recipe_id))
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(Favourite.objects.exists())
+        self.assertFalse(Cart.objects.exists())
+
+    def run_concurrently(self, method, url):
+        barrier = threading.Barrier(THREADS)
+        statuses = []
+
+        def request():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                statuses.append(getattr(client, method)(url).status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=request) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(statuses)
+
+    def test_concurrent_add_and_delete(self):
+        for model, name in (
+                (Favourite, 'add_delete_favourites'),
+                (Cart, 'add_delete_recipes_from_cart'),
+        ):
+            url = self.url(name)
+            self.assertEqual(
+                self.run_concurrently('post', url),
+                [201] + [400] * (THREADS - 1)
+            )
+            self.assertEqual(model.objects.count(), 1)
+            self.assertEqual(
+                self.run_concurrently('delete', url),
+                [204] + [404] * (THREADS - 1)
+            )
+            self.assertFalse(model.objects.exists())
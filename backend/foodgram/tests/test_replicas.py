@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram.replicas import (ReplicaRouter, ReplicaRoutingMiddleware,
+                               get_read_replica)
+from recipes.models import PrimaryPin, Recipe
+from tests.fixtures import create_recipe, create_user
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """TransactionTestCase: внутри транзакции реплика не выбирается."""
+
+    def setUp(self):
+        self.user = create_user('reader')
+        self.token = Token.objects.create(user=self.user)
+        self.routes = []
+
+    def view(self, status=200, user=None):
+        def get_response(request):
+            router = ReplicaRouter()
+            self.routes.append((
+                router.db_for_read(Recipe), router.db_for_read(Token)
+            ))
+            if user is not None:
+                request.user = user
+            return HttpResponse(status=status)
+        return ReplicaRoutingMiddleware(get_response)
+
+    def get(self, token=None):
+        extra = {} if token is None else {
+            'HTTP_AUTHORIZATION': f'Token {token.key}'
+        }
+        self.view()(RequestFactory().get('/api/recipes/', **extra))
+        return self.routes.pop()
+
+    def test_reads_go_to_replica_tokens_to_primary(self):
+        self.assertEqual(self.get(), ('replica_1', DEFAULT_DB_ALIAS))
+        self.assertEqual(self.get(self.token), ('replica_1', DEFAULT_DB_ALIAS))
+        self.assertIsNone(get_read_replica())
+
+    def test_successful_write_pins_user(self):
+        other = Token.objects.create(user=create_user('other'))
+        self.view(status=201, user=self.user)(
+            RequestFactory().post('/api/recipes/1/favorite/')
+        )
+        self.assertEqual(self.routes.pop()[0], DEFAULT_DB_ALIAS)
+        self.assertEqual(self.get(self.token)[0], DEFAULT_DB_ALIAS)
+        self.assertEqual(self.get(other)[0], 'replica_1')
+        self.assertEqual(self.get()[0], 'replica_1')
+        PrimaryPin.objects.update(until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.get(self.token)[0], 'replica_1')
+
+    def test_failed_or_anonymous_write_does_not_pin(self):
+        self.view(status=400, user=self.user)(
+            RequestFactory().post('/api/recipes/')
+        )
+        self.view(status=201)(RequestFactory().post('/api/users/'))
+        self.assertFalse(PrimaryPin.objects.exists())
+
+    def test_drf_user_is_pinned_through_the_stack(self):
+        recipe = create_recipe(create_user('author'), 'Блины')
+        client = APIClient(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        url = f'/api/recipes/{recipe.id}/favorite/'
+        self.assertEqual(client.post(url).status_code, 201)
+        pin = PrimaryPin.objects.get()
+        self.assertEqual(pin.user_id, self.user.id)
+        self.assertGreater(pin.until, timezone.now())
+        pin.delete()
+        # Повторное добавление — 400, закрепление не продлевается.
+        self.assertEqual(client.post(url).status_code, 400)
+        self.assertFalse(PrimaryPin.objects.exists())
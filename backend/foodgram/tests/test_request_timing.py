@@ -0,0 +1,58 @@
+import time
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from foodgram.middleware import RequestMetrics
+from tests.fixtures import create_recipe, create_tags, create_user
+
+
+class RequestMetricsTest(SimpleTestCase):
+
+    def test_measure_excludes_nested_queries_and_measures(self):
+        metrics = RequestMetrics()
+
+        def execute(sql, params, many, context):
+            time.sleep(0.05)
+
+        with metrics.measure('serialize_time'):
+            time.sleep(0.02)
+            with metrics.measure('serialize_time'):
+                metrics(execute, 'SELECT 1', (), False, {})
+        self.assertGreaterEqual(metrics.db_time, 0.05)
+        self.assertGreaterEqual(metrics.serialize_time, 0.02)
+        self.assertLess(metrics.serialize_time, 0.05)
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True)
+class ServerTimingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        tags = create_tags()
+        for number in range(3):
+            create_recipe(cls.user, f'Рецепт {number}', tags=tags)
+
+    def assert_serialization_timed(self, **headers):
+        response = self.client.get(
+            '/api/recipes/?fields=id,tags,author,is_favorited', **headers
+        )
+        self.assertEqual(response.status_code, 200)
+        entries = [
+            entry.split(';')[0]
+            for entry in response['Server-Timing'].split(', ')
+        ]
+        self.assertEqual(
+            entries, ['db', 'serialize', 'render', 'app', 'total']
+        )
+        self.assertGreater(response.wsgi_request.metrics.serialize_time, 0)
+
+    def test_values_serializer(self):
+        self.assert_serialization_timed()
+
+    def test_model_serializer(self):
+        token = Token.objects.create(user=self.user)
+        self.assert_serialization_timed(
+            HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
@@ -0,0 +1,72 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.test import SimpleTestCase, TestCase
+
+from recipes.search import fts_match_expression, tsquery_expression
+from tests.fixtures import create_recipe, create_user
+
+
+class SearchExpressionTest(SimpleTestCase):
+
+    def test_both_backends_match_every_word_by_prefix(self):
+        self.assertEqual(
+            fts_match_expression(' суп  с"ыр '), '"суп"* "с""ыр"*'
+        )
+        self.assertEqual(
+            tsquery_expression(" суп  с'ыр "), "'суп':* & 'с''ыр':*"
+        )
+
+
+class RecipeSearchTest(TestCase):
+    url = '/api/recipes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.pancakes = create_recipe(
+            author, 'Блины на молоке', text='Тонкие и кружевные'
+        )
+        cls.fritters = create_recipe(
+            author, 'Оладьи', text='Почти как блины, только толще'
+        )
+        create_recipe(author, 'Суп', text='Горячий')
+        cls.borscht = [
+            create_recipe(author, 'Борщ', text='Со сметаной').id
+            for _ in range(5)
+        ]
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_prefix_match_ranks_name_above_text(self):
+        data = self.search('блин')
+        self.assertEqual(
+            [recipe['id'] for recipe in data['results']],
+            [self.pancakes.id, self.fritters.id]
+        )
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(self.search('блин суп')['results'], [])
+
+    def test_cursor_walks_ties_by_id(self):
+        ids, params = [], {'limit': 2}
+        while True:
+            data = self.search('борщ', **params)
+            self.assertEqual(data['count'], 5)
+            self.assertIsNone(data['previous'])
+            ids += [recipe['id'] for recipe in data['results']]
+            if data['next'] is None:
+                break
+            params['cursor'] = parse_qs(urlparse(data['next']).query)[
+                'cursor'
+            ][0]
+        self.assertEqual(ids, sorted(self.borscht, reverse=True))
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'bm90OmFuOmlk'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    self.url, {'search': 'борщ', 'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
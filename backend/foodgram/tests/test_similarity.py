@@ -0,0 +1,122 @@
+from django.test import TestCase
+
+from recipes.models import Ingredient, IngredientAmount, SimilarRecipe
+from recipes.similarity import (TOP_K, rebuild_similar_recipes,
+                                update_similar_recipes)
+from tests.fixtures import create_recipe, create_tags, create_user
+
+
+def snapshot():
+    return list(SimilarRecipe.objects.order_by(
+        'recipe_id', 'rank'
+    ).values_list('recipe_id', 'rank', 'similar_id', 'score'))
+
+
+class SimilarRecipesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tags = create_tags()
+        cls.ingredients = {
+            name: Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in (
+                'соль', 'перец', 'мука', 'молоко', 'яйца', 'сахар', 'рис',
+                'курица', 'лук', 'морковь',
+            )
+        }
+
+    def make(self, name, *ingredients, tags=()):
+        return create_recipe(
+            self.author, name, tags=tags,
+            ingredients=[(self.ingredients[item], 1) for item in ingredients]
+        )
+
+    def set_ingredients(self, recipe, *ingredients):
+        recipe.ingredients.set([
+            IngredientAmount.objects.create(
+                ingredient=self.ingredients[item], amount=1
+            )
+            for item in ingredients
+        ])
+        update_similar_recipes([recipe.id])
+
+    def assert_matches_rebuild(self):
+        incremental = snapshot()
+        rebuild_similar_recipes()
+        self.assertEqual(incremental, snapshot())
+
+    def test_cosine_scores(self):
+        pancakes = self.make('Блины', 'мука', 'молоко', tags=self.tags[:1])
+        crepes = self.make('Крепы', 'мука', 'молоко', tags=self.tags[:1])
+        noodles = self.make('Лапша', 'мука', 'яйца')
+        self.make('Плов', 'рис')
+        rebuild_similar_recipes()
+        rows = SimilarRecipe.objects.filter(recipe=pancakes).values_list(
+            'similar_id', 'score'
+        )
+        # Блины: мука, молоко, тег 0.5 — норма 1.5; Лапша — норма √2.
+        self.assertEqual(
+            [(similar_id, round(score, 4)) for similar_id, score in rows],
+            [(crepes.id, 1.0), (noodles.id, round(1 / (1.5 * 2 ** 0.5), 4))]
+        )
+
+    def test_update_matches_rebuild(self):
+        names = ['мука', 'молоко', 'яйца', 'сахар', 'рис', 'курица', 'лук']
+        recipes = [
+            self.make(
+                f'Рецепт {n}', 'соль', names[n % 7], names[(n * 3) % 7],
+                tags=self.tags[n % 3:n % 3 + 1]
+            )
+            for n in range(TOP_K + 4)
+        ]
+        rebuild_similar_recipes()
+        self.set_ingredients(recipes[0], 'соль', 'мука', 'молоко', 'яйца')
+        self.assert_matches_rebuild()
+        # Рецепт уходит из чужих списков: места занимают следующие.
+        self.set_ingredients(recipes[1], 'морковь')
+        self.assert_matches_rebuild()
+        new = self.make('Новый', 'соль', 'курица', 'лук')
+        update_similar_recipes([new.id])
+        self.assert_matches_rebuild()
+
+    def test_update_leaves_full_lists_alone(self):
+        recipes = [
+            self.make(f'Рецепт {n}', 'соль', 'перец')
+            for n in range(TOP_K + 2)
+        ]
+        rebuild_similar_recipes()
+        untouched = set(SimilarRecipe.objects.values_list('pk', flat=True))
+        # Только соль: 1/√2 ниже, чем у полных списков соседей (1.0).
+        salted = self.make('Соленое', 'соль')
+        update_similar_recipes([salted.id])
+        self.assertEqual(
+            set(SimilarRecipe.objects.exclude(recipe=salted).values_list(
+                'pk', flat=True
+            )),
+            untouched
+        )
+        self.assertEqual(
+            SimilarRecipe.objects.filter(recipe=salted).count(), TOP_K
+        )
+        self.assertEqual(
+            SimilarRecipe.objects.filter(recipe=recipes[0]).count(), TOP_K
+        )
+        self.assert_matches_rebuild()
+
+    def test_similar_endpoint(self):
+        pancakes = self.make('Блины', 'мука', 'молоко')
+        crepes = self.make('Крепы', 'мука', 'молоко')
+        rebuild_similar_recipes()
+        response = self.client.get(f'/api/recipes/{pancakes.id}/similar/')
+        self.assertEqual(response.status_code, 200)
+        [row] = response.json()
+        self.assertEqual(
+            {key: row[key] for key in ('id', 'name', 'cooking_time', 'score')},
+            {'id': crepes.id, 'name': 'Крепы', 'cooking_time': 10,
+             'score': 1.0}
+        )
+        self.assertTrue(row['image'].endswith('.png'))
+        for recipe_id in (10 ** 6, 'abc'):
+            response = self.client.get(f'/api/recipes/{recipe_id}/similar/')
+            self.assertEqual(response.status_code, 404)
@@ -0,0 +1,138 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from foodgram import tasks
+from recipes.models import Task
+
+calls = []
+
+
+@tasks.task(max_attempts=2)
+def record_call(value):
+    calls.append(value)
+
+
+@tasks.task(max_attempts=2)
+def broken():
+    raise ValueError('сломалась')
+
+
+@tasks.task()
+def steal_lease():
+    """Имитирует другого воркера, забравшего задачу посреди работы."""
+    Task.objects.filter(name=steal_lease.task_name).update(lease='stolen')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTest(TransactionTestCase):
+    """TransactionTestCase: execute закрывает соединения потока."""
+
+    def setUp(self):
+        calls.clear()
+
+    def expire(self, task_id):
+        Task.objects.filter(pk=task_id).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_enqueue_dedup(self):
+        first = record_call.enqueue(1, dedup_key='key')
+        self.assertIsNotNone(first)
+        self.assertIsNone(record_call.enqueue(2, dedup_key='key'))
+        self.assertEqual(Task.objects.count(), 1)
+        [(pk, lease)] = tasks.claim(10)
+        tasks.execute(pk, lease)
+        self.assertIsNotNone(record_call.enqueue(3, dedup_key='key'))
+        self.assertEqual(calls, [1])
+
+    def test_claim_skips_future_and_claimed_tasks(self):
+        ready = record_call.enqueue(1)
+        record_call.enqueue(2, run_at=timezone.now() + timedelta(hours=1))
+        claimed = tasks.claim(10)
+        self.assertEqual([pk for pk, _ in claimed], [ready.pk])
+        self.assertEqual(tasks.claim(10), [])
+        task = Task.objects.get(pk=ready.pk)
+        self.assertEqual(
+            (task.status, task.attempts, task.lease),
+            (Task.RUNNING, 1, claimed[0][1])
+        )
+
+    def test_expired_lease_is_reclaimed_until_attempts_run_out(self):
+        pk = record_call.enqueue(1).pk
+        [(_, first_lease)] = tasks.claim(10)
+        self.expire(pk)
+        [(reclaimed, second_lease)] = tasks.claim(10)
+        self.assertEqual(reclaimed, pk)
+        self.assertNotEqual(first_lease, second_lease)
+        self.expire(pk)
+        self.assertEqual(tasks.claim(10), [])
+        task = Task.objects.get(pk=pk)
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+
+    def test_stale_worker_does_not_run_or_finish_task(self):
+        pk = record_call.enqueue(1).pk
+        [(_, stale_lease)] = tasks.claim(10)
+        self.expire(pk)
+        tasks.claim(10)
+        tasks.execute(pk, stale_lease)
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.get(pk=pk).status, Task.RUNNING)
+
+    def test_result_is_dropped_when_lease_is_lost(self):
+        pk = steal_lease.enqueue().pk
+        [(_, lease)] = tasks.claim(10)
+        with self.assertLogs('foodgram.tasks', 'WARNING'):
+            tasks.execute(pk, lease)
+        task = Task.objects.get(pk=pk)
+        self.assertEqual((task.status, task.lease), (Task.RUNNING, 'stolen'))
+
+    def test_renew_lease_requires_ownership(self):
+        pk = record_call.enqueue(1).pk
+        [(_, lease)] = tasks.claim(10)
+        self.expire(pk)
+        self.assertEqual(tasks.renew_lease(pk, 'other'), 0)
+        self.assertEqual(tasks.renew_lease(pk, lease), 1)
+        self.assertGreater(
+            Task.objects.get(pk=pk).locked_until, timezone.now()
+        )
+
+    def test_failed_task_backs_off_then_fails(self):
+        pk = broken.enqueue().pk
+        before = timezone.now()
+        with self.assertLogs('foodgram.tasks', 'ERROR'):
+            tasks.execute(*tasks.claim(10)[0])
+        task = Task.objects.get(pk=pk)
+        self.assertEqual(task.status, Task.PENDING)
+        self.assertIn('сломалась', task.last_error)
+        self.assertGreaterEqual(
+            task.run_at, before + timedelta(seconds=settings.TASK_RETRY_DELAY)
+        )
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.filter(pk=pk).update(run_at=timezone.now())
+        with self.assertLogs('foodgram.tasks', 'ERROR'):
+            tasks.execute(*tasks.claim(10)[0])
+        task = Task.objects.get(pk=pk)
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+
+    def test_purge_keeps_recent_and_failed_tasks(self):
+        old = timezone.now() - timedelta(days=settings.TASK_KEEP_DAYS + 1)
+        for status, finished in (
+                (Task.DONE, old),
+                (Task.DONE, timezone.now()),
+                (Task.FAILED, old),
+        ):
+            Task.objects.create(
+                name=record_call.task_name, status=status,
+                run_at=old, finished=finished
+            )
+        tasks.purge_finished_tasks()
+        self.assertEqual(
+            sorted(Task.objects.values_list('status', flat=True)),
+            [Task.DONE, Task.FAILED]
+        )
+        self.assertFalse(
+            Task.objects.filter(status=Task.DONE, finished=old).exists()
+        )
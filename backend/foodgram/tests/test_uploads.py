@@ -0,0 +1,114 @@
+import base64
+import io
+import os
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from api.parsers import LimitedTemporaryFileUploadHandler
+from recipes.models import Recipe
+from tests.fixtures import create_ingredients, create_tags, create_user
+
+
+def make_png(side=16, noise=False):
+    image = Image.new('RGB', (side, side), 'white')
+    if noise:
+        image.putdata([
+            tuple(os.urandom(3)) for _ in range(side * side)
+        ])
+    data = io.BytesIO()
+    image.save(data, 'PNG')
+    data.seek(0)
+    data.name = 'recipe.png'
+    return data
+
+
+@override_settings(UPLOAD_FILE_MAX_SIZE=100)
+class UploadHandlerTest(SimpleTestCase):
+
+    def test_writes_only_up_to_limit_but_reports_real_size(self):
+        handler = LimitedTemporaryFileUploadHandler()
+        handler.new_file('image', 'big.png', 'image/png', None)
+        start = 0
+        for chunk in (b'a' * 60, b'b' * 60, b'c' * 60):
+            handler.receive_data_chunk(chunk, start)
+            start += len(chunk)
+        uploaded = handler.file_complete(start)
+        try:
+            path = uploaded.temporary_file_path()
+            self.assertEqual(uploaded.size, 180)
+            self.assertEqual(os.path.getsize(path), 60)
+        finally:
+            uploaded.close()
+
+
+class MultipartRecipeTest(APITestCase):
+    url = '/api/recipes/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tags = create_tags()
+        cls.flour, cls.milk, _ = create_ingredients()
+
+    def setUp(self):
+        self.client.force_authenticate(self.author)
+
+    def post(self, image):
+        return self.client.post(self.url, {
+            'name': 'Блины',
+            'text': 'Смешать и пожарить',
+            'cooking_time': 20,
+            'tags': [self.tags[0].id, self.tags[1].id],
+            'ingredients[0]id': self.flour.id,
+            'ingredients[0]amount': 200,
+            'ingredients[1]id': self.milk.id,
+            'ingredients[1]amount': 300,
+            'image': image,
+        }, format='multipart')
+
+    def test_create_from_multipart(self):
+        response = self.post(make_png())
+        self.assertEqual(response.status_code, 201, response.data)
+        recipe = Recipe.objects.get()
+        self.assertEqual(
+            set(recipe.tags.values_list('id', flat=True)),
+            {self.tags[0].id, self.tags[1].id}
+        )
+        self.assertEqual(
+            set(recipe.ingredients.values_list('ingredient_id', 'amount')),
+            {(self.flour.id, 200), (self.milk.id, 300)}
+        )
+        with Image.open(recipe.image) as image:
+            self.assertEqual(image.size, (16, 16))
+
+    def test_rejections(self):
+        oversized = make_png(side=64, noise=True)
+        self.assertGreater(len(oversized.getvalue()), 1024)
+        text = io.BytesIO(b'not an image')
+        text.name = 'recipe.png'
+        for image, settings in (
+                (oversized, {'UPLOAD_FILE_MAX_SIZE': 1024}),
+                (make_png(side=32), {'RECIPE_IMAGE_MAX_SIDE': 16}),
+                (text, {}),
+        ):
+            with self.subTest(settings=settings), self.settings(**settings):
+                response = self.post(image)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(set(response.data), {'image'})
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(UPLOAD_FILE_MAX_SIZE=1024)
+    def test_base64_size_checked_before_decoding(self):
+        encoded = base64.b64encode(
+            make_png(side=64, noise=True).getvalue()
+        ).decode()
+        response = self.client.post(self.url, {
+            'name': 'Блины', 'text': 'Смешать', 'cooking_time': 20,
+            'tags': [self.tags[0].id],
+            'ingredients': [{'id': self.flour.id, 'amount': 200}],
+            'image': f'data:image/png;base64,{encoded}',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 
+from foodgram.paginators import EstimatedCountPaginator
 from users.models import Follow, User
 
 
@@ -33,8 +34,10 @@ class UserAdminCustom(UserAdmin):
             ),
         }),
     )
-    list_filter = ('email', 'username')
+    list_filter = ('is_staff', 'is_active')
     list_display = ('username', 'email', 'is_staff')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Follow)
@@ -44,3 +47,8 @@ class FollowAdmin(admin.ModelAdmin):
         'user',
         'author',
     )
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__email', 'author__email')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
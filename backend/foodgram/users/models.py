@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -35,6 +36,11 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор',
     )
+    # default, а не auto_now_add: loaddata сохраняет объекты в raw-режиме,
+    # и подписки из фикстур без даты получили бы NULL.
+    created = models.DateTimeField(
+        verbose_name='Оформлена', default=timezone.now
+    )
 
     class Meta:
         constraints = [